@@ -0,0 +1,262 @@
+"""Age band and milestone reference data.
+
+    python age_reference.py           compile the sources into
+                                      src/data/ageReference.json
+    python age_reference.py --load    also load the reference tables into
+                                      DATABASE_URL (--production:
+                                      PRODUCTION_DATABASE_URL)
+
+Sources:
+  src/data/ageBands.json                    band slugs, youngest first
+  BANDS below                               label and upper age of each band
+  attached_assets/Pasted-Age-Band-*.txt     "The Journey from ..." notes
+  attached_assets/*Milestones by Age - <band>_<upload>.csv
+                                            milestones per developmental
+                                            domain; the newest upload per band
+
+The compiled file holds the bands, the domains, the milestones and byMonth:
+for every month 0..MAX_MONTH the id of the band a product whose
+max_age_months is that month belongs to (older ages use the last band).
+import_from_sheet.py categorizes ages with it, and --load writes the same
+data to age_bands, age_band_months, development_domains and band_milestones
+so the server can join on them. Reloading replaces the tables in one
+transaction and is skipped when the compiled version is already loaded.
+"""
+import os, sys, csv, glob, json, hashlib
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+AGE_BANDS_JSON = os.path.join(ROOT, "src", "data", "ageBands.json")
+BAND_NOTES = os.path.join(ROOT, "attached_assets", "Pasted-Age-Band-What-s-Happening-*.txt")
+MILESTONE_CSVS = os.path.join(ROOT, "attached_assets", "*Milestones by Age - *.csv")
+OUTPUT = os.path.join(ROOT, "src", "data", "ageReference.json")
+
+# Oldest month in byMonth
+MAX_MONTH = 216
+
+# Slug -> (age_range_category label, oldest max_age_months in the band).
+# The bounds are inclusive, as in the importer's calc_age_category: a product
+# with max_age_months 18 is "Newborn to 18 months". categorizeAgeBand in
+# shared/ageUtils.ts places a child's age with exclusive bounds (18 months is
+# already "18m-3y"), so the two differ at every bound. The last band is
+# open-ended.
+BANDS = {
+    "newborn-18m": ("Newborn to 18 months", 18),
+    "18m-3y": ("18 months to 3 years", 36),
+    "2-5y": ("2 to 5 years", 60),
+    "3-6y": ("3 to 6 years", 72),
+    "4-7y": ("4 to 7 years", 84),
+    "5-8y": ("5 to 8 years", 96),
+    "6-9y": ("6 to 9 years", 108),
+    "7-10y": ("7 to 10 years", 120),
+    "8-11y": ("8 to 11 years", 132),
+    "9-12y": ("9 to 12 years", 144),
+    "10-early-teens": ("10 to Early Teens", 156),
+    "preteens-older-teens": ("Preteens to Older Teens", None),
+}
+
+# Label in front of a milestone cell -> band_milestones.kind
+KINDS = {"Milestone": "milestone", "The Change We See": "shift"}
+
+# Band named in a milestone file name -> band slug
+MILESTONE_BANDS = {
+    "PTs to OTs": "preteens-older-teens",
+}
+
+TABLES = """CREATE TABLE IF NOT EXISTS age_bands (
+  id smallint PRIMARY KEY,
+  slug text NOT NULL UNIQUE,
+  label text NOT NULL UNIQUE,
+  max_month smallint,
+  title text,
+  summary text
+);
+CREATE TABLE IF NOT EXISTS age_band_months (
+  month smallint PRIMARY KEY,
+  band_id smallint NOT NULL REFERENCES age_bands (id)
+);
+CREATE TABLE IF NOT EXISTS development_domains (
+  id smallint PRIMARY KEY,
+  name text NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS band_milestones (
+  id integer PRIMARY KEY,
+  band_id smallint NOT NULL REFERENCES age_bands (id),
+  domain_id smallint NOT NULL REFERENCES development_domains (id),
+  position smallint NOT NULL,
+  stage text NOT NULL,
+  kind text NOT NULL,
+  description text NOT NULL,
+  support text
+);
+CREATE INDEX IF NOT EXISTS band_milestones_band_domain_idx
+  ON band_milestones (band_id, domain_id)"""
+
+
+def newest(paths):
+    """The last upload of each file; names end in _<upload ms>.<ext>."""
+    return sorted(paths, key=lambda p: os.path.splitext(p)[0].rsplit("_", 1)[-1])[-1]
+
+
+def read_bands():
+    with open(AGE_BANDS_JSON) as f:
+        slugs = json.load(f)
+    if sorted(slugs) != sorted(BANDS):
+        raise SystemExit(f"{AGE_BANDS_JSON} and BANDS list different bands")
+    notes = glob.glob(BAND_NOTES)
+    rows = []
+    if notes:
+        with open(newest(notes), newline="") as f:
+            rows = list(csv.reader(f, delimiter="\t"))[1:]
+        if len(rows) != len(slugs):
+            raise SystemExit(f"{newest(notes)}: {len(rows)} bands, expected {len(slugs)}")
+    bands = []
+    for i, slug in enumerate(slugs):
+        label, max_month = BANDS[slug]
+        title, summary = rows[i] if rows else (None, None)
+        bands.append({"id": i + 1, "slug": slug, "label": label,
+                      "maxMonth": max_month, "title": title, "summary": summary})
+    return bands
+
+
+def by_month(bands):
+    """Band id for each max_age_months 0..MAX_MONTH; a band runs up to and
+    including its maxMonth."""
+    out, i = [], 0
+    for month in range(MAX_MONTH + 1):
+        while bands[i]["maxMonth"] is not None and month > bands[i]["maxMonth"]:
+            i += 1
+        out.append(bands[i]["id"])
+    return out
+
+
+def split(cell):
+    """("Milestone", "Peer group is ...") from "Milestone: Peer group is ..."."""
+    head, sep, text = cell.partition(":")
+    return (head.strip(), text.strip()) if sep else ("", cell.strip())
+
+
+def read_milestones(bands):
+    """(domains, milestones) from the milestone CSVs: each domain row holds
+    one milestone per stage column, and the row below it how play supports
+    it."""
+    band_ids = {b["slug"]: b["id"] for b in bands}
+    files = {}
+    for path in glob.glob(MILESTONE_CSVS):
+        name = os.path.basename(path).split(" - ", 1)[1].rsplit("_", 1)[0]
+        if name not in MILESTONE_BANDS:
+            raise SystemExit(f"{path}: unknown band {name!r} (see MILESTONE_BANDS)")
+        files.setdefault(name, []).append(path)
+    domains, milestones = {}, []
+    for name in sorted(files):
+        with open(newest(files[name]), newline="") as f:
+            header, *rows = list(csv.reader(f))
+        for row, below in zip(rows, rows[1:] + [[]]):
+            if not row or not row[0].strip():
+                continue
+            domain = domains.setdefault(row[0].strip(), len(domains) + 1)
+            support = below if below and not below[0].strip() else []
+            for position, stage in enumerate(header[1:], 1):
+                if position >= len(row) or not row[position].strip():
+                    continue
+                kind, description = split(row[position])
+                milestones.append({
+                    "id": len(milestones) + 1,
+                    "bandId": band_ids[MILESTONE_BANDS[name]],
+                    "domainId": domain,
+                    "position": position,
+                    "stage": stage.strip(),
+                    "kind": KINDS.get(kind, kind.lower().replace(" ", "_") or "milestone"),
+                    "description": description,
+                    "support": split(support[position])[1] if position < len(support) else None,
+                })
+    return [{"id": i, "name": n} for n, i in domains.items()], milestones
+
+
+def compile_sources():
+    bands = read_bands()
+    domains, milestones = read_milestones(bands)
+    ref = {"maxMonth": MAX_MONTH, "bands": bands, "byMonth": by_month(bands),
+           "domains": domains, "milestones": milestones}
+    ref["version"] = hashlib.sha256(json.dumps(ref, sort_keys=True).encode()).hexdigest()[:12]
+    return ref
+
+
+def write(ref, path=OUTPUT):
+    tmp = path + ".part"
+    with open(tmp, "w") as f:
+        json.dump(ref, f, ensure_ascii=False, separators=(",", ":"))
+        f.write("\n")
+    os.replace(tmp, path)
+
+
+def load(path=OUTPUT):
+    """The compiled reference data."""
+    with open(path) as f:
+        return json.load(f)
+
+
+def load_script(cur, ref):
+    """One script replacing the reference tables with ref; the table comment
+    on age_bands records the loaded version."""
+    from ddl_init import LOCK_TIMEOUT
+
+    def values(rows):
+        return ", ".join(cur.mogrify("(" + ", ".join(["%s"] * len(r)) + ")", r).decode()
+                         for r in rows)
+    stmts = [
+        f"SET LOCAL lock_timeout = '{LOCK_TIMEOUT}'",
+        TABLES,
+        "TRUNCATE band_milestones, age_band_months, development_domains, age_bands",
+        "INSERT INTO age_bands VALUES " + values(
+            [(b["id"], b["slug"], b["label"], b["maxMonth"], b["title"], b["summary"])
+             for b in ref["bands"]]),
+        "INSERT INTO age_band_months VALUES " + values(enumerate(ref["byMonth"])),
+    ]
+    if ref["domains"]:
+        stmts.append("INSERT INTO development_domains VALUES " + values(
+            [(d["id"], d["name"]) for d in ref["domains"]]))
+    if ref["milestones"]:
+        stmts.append("INSERT INTO band_milestones VALUES " + values(
+            [(m["id"], m["bandId"], m["domainId"], m["position"], m["stage"], m["kind"],
+              m["description"], m["support"]) for m in ref["milestones"]]))
+    stmts.append(cur.mogrify("COMMENT ON TABLE age_bands IS %s", (ref["version"], )).decode())
+    return ";\n".join(stmts) + ";"
+
+
+def load_tables(dsn, ref):
+    import psycopg2
+    import psycopg2.errors
+    from ddl_init import LOCK_TIMEOUT
+
+    with psycopg2.connect(dsn) as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT obj_description(to_regclass('age_bands'), 'pg_class')")
+            if cur.fetchone()[0] == ref["version"]:
+                print(f"reference tables up to date ({ref['version']}).")
+                return False
+            try:
+                cur.execute(load_script(cur, ref))
+            except psycopg2.errors.LockNotAvailable:
+                conn.rollback()
+                raise SystemExit(
+                    f"reference tables are busy (no lock within {LOCK_TIMEOUT}); nothing changed, try again")
+        conn.commit()
+    print(f"reference tables loaded ({ref['version']}): {len(ref['bands'])} bands, "
+          f"{len(ref['domains'])} domains, {len(ref['milestones'])} milestones.")
+    return True
+
+
+def main():
+    ref = compile_sources()
+    write(ref)
+    print(f"{os.path.relpath(OUTPUT, ROOT)} written ({ref['version']}).")
+    if "--load" in sys.argv:
+        production = "--production" in sys.argv or "--prod" in sys.argv
+        dsn = (production and os.environ.get("PRODUCTION_DATABASE_URL")) or os.environ.get("DATABASE_URL")
+        if not dsn:
+            raise SystemExit("DATABASE_URL is not set")
+        load_tables(dsn, ref)
+
+
+if __name__ == "__main__":
+    main()
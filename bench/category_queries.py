@@ -0,0 +1,63 @@
+"""Category lookups: text[] containment on a GIN index vs a full scan.
+
+getProductsByCategory used to SELECT the whole products table and filter
+in JS; this loads a synthetic catalog into a scratch database (products
+created by ddl_reset.py) and times that against categories @> ARRAY[...].
+
+    BENCH_DATABASE_URL=postgresql://localhost/bench python bench/category_queries.py
+"""
+import os, sys, time
+
+from upsert_loaders import fake_rows, imp, CATEGORIES
+import psycopg2
+
+SIZES = [10_000, 100_000]
+REPEAT = 5
+
+
+def full_scan(cur, category):
+        cur.execute("SELECT * FROM products;")
+        return [r for r in cur.fetchall() if category in (r[6] or [])]
+
+
+def containment(cur, category):
+        cur.execute("SELECT * FROM products WHERE categories @> ARRAY[%s]::text[];",
+                    (category, ))
+        return cur.fetchall()
+
+
+def best_of(fn, cur):
+        """Best total time over REPEAT runs of fn for every category."""
+        best = None
+        for _ in range(REPEAT):
+                t0 = time.perf_counter()
+                hits = sum(len(fn(cur, c)) for c in CATEGORIES)
+                dt = time.perf_counter() - t0
+                best = dt if best is None else min(best, dt)
+        return best / len(CATEGORIES), hits
+
+
+if __name__ == "__main__":
+        sizes = SIZES
+        if imp.get_arg("--sizes"):
+                sizes = [int(s) for s in imp.get_arg("--sizes").split(",")]
+
+        print(f"{'rows':>10} {'scan ms':>9} {'@> ms':>9} {'speedup':>8}")
+        with psycopg2.connect(os.environ["BENCH_DATABASE_URL"]) as conn:
+                with conn.cursor() as cur:
+                        for n in sizes:
+                                cur.execute("TRUNCATE products;")
+                                imp.write_rows(cur, fake_rows(n))
+                                conn.commit()
+                                cur.execute("ANALYZE products;")
+                                scan, a = best_of(full_scan, cur)
+                                gin, b = best_of(containment, cur)
+                                assert a == b, (a, b)
+                                print(f"{n:>10} {scan * 1000:>9.1f} "
+                                      f"{gin * 1000:>9.1f} {scan / gin:>7.1f}x")
+                        cur.execute(
+                            "EXPLAIN SELECT * FROM products "
+                            "WHERE categories @> ARRAY['Books']::text[];")
+                        print("\n".join(r[0] for r in cur.fetchall()))
+                        cur.execute("TRUNCATE products;")
+                conn.commit()
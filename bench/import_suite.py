@@ -0,0 +1,159 @@
+"""Import benchmark suite over synthetic sheets from synth.py.
+
+For each size a seeded sheet is generated and these cases are timed:
+
+    parse      pd.read_csv of the sheet
+    normalize  normalize(), what load_csv runs after the download
+    encode     encode_rows(), the row tuples handed to the loaders
+    e2e        import_from_sheet.py end to end against a scratch database
+               reset with ddl_reset.py, the sheet served over local HTTP
+               (only when BENCH_DATABASE_URL is set; every run drops products)
+
+Results are appended to bench/results.jsonl tagged with the current commit,
+and each case is compared with its latest result from a different commit.
+
+    python bench/import_suite.py --sizes 1000,100000
+    BENCH_DATABASE_URL=postgresql://localhost/bench python bench/import_suite.py
+    BENCH_DATABASE_URL=... python bench/import_suite.py --e2e-args "--chunk-size 10000"
+"""
+import os, sys, json, time, shlex, tempfile, threading, subprocess, functools
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+
+os.environ.setdefault("SHEET_CSV_URL", "")
+os.environ.setdefault("DATABASE_URL", os.environ.get("BENCH_DATABASE_URL", ""))
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+import pandas as pd
+import import_from_sheet as imp
+from synth import generate
+
+SIZES = [1_000, 100_000, 1_000_000]
+RESULTS = os.path.join(ROOT, "bench", "results.jsonl")
+
+
+def best_of(fn, repeat):
+        """Best wall time of repeat calls to fn, and its last result."""
+        best = None
+        for _ in range(repeat):
+                t0 = time.perf_counter()
+                out = fn()
+                dt = time.perf_counter() - t0
+                best = dt if best is None else min(best, dt)
+        return best, out
+
+
+def commit():
+        def git(*args):
+                return subprocess.run(["git", *args], cwd=ROOT, text=True,
+                                      capture_output=True).stdout.strip()
+
+        rev = git("rev-parse", "--short", "HEAD") or "unknown"
+        if git("status", "--porcelain", "--untracked-files=no"):
+                rev += "-dirty"
+        return rev
+
+
+class QuietHandler(SimpleHTTPRequestHandler):
+        def log_message(self, *args):
+                pass
+
+
+def serve(directory):
+        """Serve directory over HTTP on a free local port."""
+        srv = ThreadingHTTPServer(
+            ("127.0.0.1", 0),
+            functools.partial(QuietHandler, directory=directory))
+        threading.Thread(target=srv.serve_forever, daemon=True).start()
+        return srv
+
+
+def end_to_end(tmp, sheet, port, extra):
+        """Reset the scratch database and run one import; returns its report."""
+        env = dict(os.environ,
+                   DATABASE_URL=os.environ["BENCH_DATABASE_URL"],
+                   SHEET_CSV_URL=f"http://127.0.0.1:{port}/{os.path.basename(sheet)}",
+                   IMPORT_CACHE_DIR=os.path.join(tmp, "cache"))
+        env.pop("IMPORT_TO_PRODUCTION", None)
+        subprocess.run([sys.executable, "ddl_reset.py"], cwd=ROOT, env=env,
+                       check=True, capture_output=True)
+        report = os.path.join(tmp, "report.json")
+        subprocess.run([sys.executable, "import_from_sheet.py", "--force",
+                        "--report", report, *extra],
+                       cwd=ROOT, env=env, check=True, capture_output=True)
+        with open(report) as f:
+                return json.load(f)
+
+
+def previous(history, entry):
+        """Latest result of the same case and inputs from another commit."""
+        key = ("case", "rows", "seed", "dirty", "args")
+        for h in reversed(history):
+                if h["commit"] != entry["commit"] and all(
+                    h.get(k) == entry.get(k) for k in key):
+                        return h
+        return None
+
+
+if __name__ == "__main__":
+        sizes = SIZES
+        if imp.get_arg("--sizes"):
+                sizes = [int(s) for s in imp.get_arg("--sizes").split(",")]
+        seed = int(imp.get_arg("--seed", 0))
+        dirty = float(imp.get_arg("--dirty", 0.1))
+        extra = shlex.split(imp.get_arg("--e2e-args", ""))
+        e2e = bool(os.environ.get("BENCH_DATABASE_URL"))
+
+        rev = commit()
+        history = []
+        if os.path.exists(RESULTS):
+                with open(RESULTS) as f:
+                        history = [json.loads(line) for line in f if line.strip()]
+
+        print(f"commit {rev}, seed {seed}, dirty {dirty}")
+        print(f"{'rows':>10} {'case':>10} {'seconds':>9} {'rows/s':>11} "
+              f"{'vs prev':>16}")
+        with tempfile.TemporaryDirectory() as tmp:
+                srv = serve(tmp) if e2e else None
+                for n in sizes:
+                        sheet = generate(os.path.join(tmp, f"sheet_{n}.csv"), n,
+                                         seed, dirty)
+                        repeat = 3 if n <= 100_000 else 1
+                        results = {}
+                        results["parse"], raw = best_of(
+                            lambda: pd.read_csv(sheet), repeat)
+                        results["normalize"], df = best_of(
+                            lambda: imp.normalize(raw), repeat)
+                        results["encode"], _ = best_of(
+                            lambda: list(imp.encode_rows(df)), repeat)
+                        stages = None
+                        if e2e:
+                                report = end_to_end(tmp, sheet,
+                                                    srv.server_address[1], extra)
+                                results["e2e"] = report["seconds"]
+                                stages = report["stages"]
+
+                        with open(RESULTS, "a") as f:
+                                for case, dt in results.items():
+                                        entry = {
+                                            "commit": rev,
+                                            "at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                                            "case": case,
+                                            "rows": n,
+                                            "seed": seed,
+                                            "dirty": dirty,
+                                            "seconds": round(dt, 4)
+                                        }
+                                        if case == "e2e":
+                                                entry["args"] = extra
+                                                entry["stages"] = stages
+                                        prev = previous(history, entry)
+                                        cmp = ""
+                                        if prev:
+                                                cmp = f"{dt / prev['seconds']:.2f}x {prev['commit']}"
+                                        print(f"{n:>10} {case:>10} {dt:>9.3f} "
+                                              f"{n / dt:>11,.0f} {cmp:>16}")
+                                        f.write(json.dumps(entry) + "\n")
+                if srv:
+                        srv.shutdown()
+        print(f"results appended to {os.path.relpath(RESULTS)}")
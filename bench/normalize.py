@@ -0,0 +1,339 @@
+"""The baseline load_csv vs normalize().
+
+Normalizes a synthetic sheet (see synth.py) both ways, checks the frames
+agree cell for cell and encode to identical tuples, and prints the timings.
+The baseline side is load_csv as it was before normalize() replaced it,
+copied below with the helpers and allowlists it used, so later changes to
+import_from_sheet.py do not move the baseline.
+
+    python bench/normalize.py
+    python bench/normalize.py --sizes 10000,100000 --dirty 0.3
+    python bench/normalize.py --sheet export.csv   first --sizes rows of a
+                                                   real export instead
+"""
+import os, sys, time, tempfile
+
+os.environ.setdefault("SHEET_CSV_URL", "")
+os.environ.setdefault("DATABASE_URL", "")
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import pandas as pd
+import import_from_sheet as imp
+from synth import generate
+
+SIZES = [100_000]
+
+# ---- baseline: import_from_sheet.py load_csv and what it called, verbatim
+# apart from taking the parsed sheet instead of downloading it ----
+
+PROMOTE_ON_IMPORT = True  # set imported rows to "live"
+
+# Column order (39 fields)
+COLS = [
+    'id', 'name', 'brand', 'description', 'price', 'image_url', 'categories',
+    'age_range', 'rating', 'review_count', 'affiliate_url', 'is_top_pick',
+    'is_bestseller', 'is_new', 'min_age_months', 'max_age_months',
+    'age_range_category', 'communication_levels', 'motor_levels',
+    'cognitive_levels', 'social_emotional_levels', 'play_type_tags',
+    'complexity_level', 'challenge_rating', 'attention_duration',
+    'stimulation_level', 'structure_preference', 'energy_requirement',
+    'sensory_compatibility', 'social_context', 'cooperation_required',
+    'safety_considerations', 'special_needs_support', 'intervention_focus',
+    'noise_level', 'mess_factor', 'setup_time', 'space_requirements',
+    'is_liza_toph_certified', 'status'
+]
+
+# Allowed enums
+AL_DEV = {"emerging", "developing", "proficient", "advanced"}
+AL_AGE_CAT = {
+    "Newborn to 18 months", "18 months to 3 years", "2 to 5 years",
+    "3 to 6 years", "4 to 7 years", "5 to 8 years", "6 to 9 years",
+    "7 to 10 years", "8 to 11 years", "9 to 12 years", "10 to Early Teens",
+    "Preteens to Older Teens"
+}
+AL_PLAY = {
+    "pretend_play", "building_toys", "art_supplies", "active_play", "puzzles",
+    "musical_toys", "sensory_toys", "group_games", "imagination",
+    "construction", "crafts", "sports", "logic_games", "rhythm", "textures",
+    "social_interaction"
+}
+AL_COMPLEX = {"simple", "moderate", "complex", "advanced", "expert"}
+AL_ATTN = {
+    "quick_activities", "medium_activities", "detailed_activities",
+    "complex_projects", "advanced_building"
+}
+AL_STIM = {"low", "moderate", "high"}
+AL_STRUCT = {"structured", "flexible", "open_ended"}
+AL_ENERGY = {"sedentary", "moderate", "active", "high_energy"}
+AL_SENS = {"gentle", "moderate", "intense"}
+AL_SOC = {"solo_play", "paired_play", "group_play", "family_play"}
+AL_SAFE = {"choking_hazard", "supervision_required", "small_parts"}
+AL_NEEDS = {
+    "autism_friendly", "sensory_processing", "speech_therapy", "motor_therapy"
+}
+AL_INT = {"communication", "motor_skills", "social_skills", "behavior_support"}
+AL_NOISE = {"quiet", "moderate", "loud"}
+AL_MESS = {"minimal", "moderate", "messy"}
+AL_SETUP = {"immediate", "quick", "moderate", "extended"}
+AL_SPACE = {"small", "medium", "large", "outdoor"}
+
+
+def norm_text(s):
+        if s is None: return None
+        return (str(s).replace("\u2019", "'").replace("\u2018", "'").replace(
+            "\u201c", '"').replace("\u201d",
+                                   '"').replace("\u2013",
+                                                "-").replace("\u2014", "-"))
+
+
+def norm_multi(s):
+        if pd.isna(s) or str(s).strip() == "":
+                return ""
+        items, seen = [], set()
+        for p in str(s).split(","):
+                t = p.strip()
+                if t and t not in seen:
+                        seen.add(t)
+                        items.append(t)
+        return ", ".join(items)
+
+
+def filter_multi(value, allowed):
+        if value is None or str(value).strip() == "":
+                return ""
+        kept = []
+        for t in str(value).split(","):
+                t = t.strip()
+                if t in allowed and t not in kept:
+                        kept.append(t)
+        return ", ".join(kept)
+
+
+def check_enum(value, allowed):
+        if value is None: return ""
+        v = str(value).strip()
+        return v if v in allowed else ""
+
+
+def calc_age_category(min_m, max_m):
+        if min_m is None or max_m is None:
+                return ""
+        end_y = max_m / 12.0
+        if end_y <= 1.5: return "Newborn to 18 months"
+        if end_y <= 3: return "18 months to 3 years"
+        if end_y <= 5: return "2 to 5 years"
+        if end_y <= 6: return "3 to 6 years"
+        if end_y <= 7: return "4 to 7 years"
+        if end_y <= 8: return "5 to 8 years"
+        if end_y <= 9: return "6 to 9 years"
+        if end_y <= 10: return "7 to 10 years"
+        if end_y <= 11: return "8 to 11 years"
+        if end_y <= 12: return "9 to 12 years"
+        if end_y <= 13: return "10 to Early Teens"
+        return "Preteens to Older Teens"
+
+
+def convert_google_drive_url(url):
+        """Convert Google Drive share links to direct image URLs."""
+        if pd.isna(url) or not url:
+                return url
+        
+        url_str = str(url).strip()
+        
+        # Skip if not a Google Drive URL
+        if 'drive.google.com' not in url_str and 'drive.usercontent.google.com' not in url_str:
+                return url_str
+        
+        # Already in thumbnail format (optimal for embedding)
+        if 'lh3.googleusercontent.com' in url_str or 'drive.usercontent.google.com/download' in url_str:
+                return url_str
+        
+        # Extract file ID from various Google Drive URL formats
+        file_id = None
+        
+        # Format: https://drive.google.com/file/d/FILE_ID/view
+        if '/file/d/' in url_str:
+                parts = url_str.split('/file/d/')
+                if len(parts) > 1:
+                        file_id = parts[1].split('/')[0].split('?')[0]
+        
+        # Format: https://drive.google.com/open?id=FILE_ID
+        elif 'open?id=' in url_str:
+                parts = url_str.split('open?id=')
+                if len(parts) > 1:
+                        file_id = parts[1].split('&')[0].split('#')[0]
+        
+        # Format: https://drive.google.com/uc?id=FILE_ID or uc?export=view&id=FILE_ID
+        elif 'uc?' in url_str and 'id=' in url_str:
+                parts = url_str.split('id=')
+                if len(parts) > 1:
+                        file_id = parts[1].split('&')[0].split('#')[0]
+        
+        # If we found a file ID, convert to thumbnail URL (better for embedding)
+        if file_id:
+                # Use thumbnail format which works better for direct image embedding
+                return f"https://drive.google.com/thumbnail?id={file_id}&sz=w1000"
+        
+        # Return original if we couldn't parse it
+        return url_str
+
+
+def load_csv(df):
+        # keep rows with status approved or live
+        s = df["status"].astype(str).str.lower().str.strip()
+        df = df[s.isin({"approved", "live"})].copy()
+
+        # normalize text fields
+        text_cols = [
+            "id", "name", "brand", "description", "image_url", "age_range",
+            "affiliate_url", "age_range_category", "communication_levels",
+            "motor_levels", "cognitive_levels", "social_emotional_levels",
+            "complexity_level", "attention_duration", "stimulation_level",
+            "structure_preference", "energy_requirement", "noise_level",
+            "mess_factor", "setup_time", "space_requirements", "status",
+            "categories", "play_type_tags", "sensory_compatibility",
+            "social_context", "safety_considerations", "special_needs_support",
+            "intervention_focus"
+        ]
+        for c in text_cols:
+                if c in df.columns:
+                        df[c] = df[c].apply(lambda x: ""
+                                            if pd.isna(x) else norm_text(x))
+
+        # Convert Google Drive URLs to direct image URLs
+        if "image_url" in df.columns:
+                df["image_url"] = df["image_url"].apply(convert_google_drive_url)
+
+        # clean multi selects then enforce allowlists
+        for c in [
+            "categories", "play_type_tags", "sensory_compatibility",
+            "social_context", "safety_considerations", "special_needs_support",
+            "intervention_focus"
+        ]:
+                if c in df.columns:
+                        df[c] = df[c].apply(norm_multi)
+
+        df["communication_levels"] = df["communication_levels"].apply(
+            lambda v: check_enum(v, AL_DEV))
+        df["motor_levels"] = df["motor_levels"].apply(
+            lambda v: check_enum(v, AL_DEV))
+        df["cognitive_levels"] = df["cognitive_levels"].apply(
+            lambda v: check_enum(v, AL_DEV))
+        df["social_emotional_levels"] = df["social_emotional_levels"].apply(
+            lambda v: check_enum(v, AL_DEV))
+        df["complexity_level"] = df["complexity_level"].apply(
+            lambda v: check_enum(v, AL_COMPLEX))
+        df["attention_duration"] = df["attention_duration"].apply(
+            lambda v: check_enum(v, AL_ATTN))
+        df["stimulation_level"] = df["stimulation_level"].apply(
+            lambda v: check_enum(v, AL_STIM))
+        df["structure_preference"] = df["structure_preference"].apply(
+            lambda v: check_enum(v, AL_STRUCT))
+        df["energy_requirement"] = df["energy_requirement"].apply(
+            lambda v: check_enum(v, AL_ENERGY))
+        df["noise_level"] = df["noise_level"].apply(
+            lambda v: check_enum(v, AL_NOISE))
+        df["mess_factor"] = df["mess_factor"].apply(
+            lambda v: check_enum(v, AL_MESS))
+        df["setup_time"] = df["setup_time"].apply(
+            lambda v: check_enum(v, AL_SETUP))
+        df["space_requirements"] = df["space_requirements"].apply(
+            lambda v: check_enum(v, AL_SPACE))
+
+        df["play_type_tags"] = df["play_type_tags"].apply(
+            lambda v: filter_multi(v, AL_PLAY))
+        df["safety_considerations"] = df["safety_considerations"].apply(
+            lambda v: filter_multi(v, AL_SAFE))
+        df["special_needs_support"] = df["special_needs_support"].apply(
+            lambda v: filter_multi(v, AL_NEEDS))
+        df["intervention_focus"] = df["intervention_focus"].apply(
+            lambda v: filter_multi(v, AL_INT))
+
+        # age sanity and auto age_range_category if missing
+        def fix_row(row):
+
+                def to_int_or_none(x):
+                        if pd.isna(x): return None
+                        sx = str(x).strip()
+                        if sx == "": return None
+                        try:
+                                return int(float(sx))
+                        except:
+                                return None
+
+                minm = to_int_or_none(row.get("min_age_months"))
+                maxm = to_int_or_none(row.get("max_age_months"))
+                if minm is not None and maxm is not None and maxm < minm:
+                        maxm = minm
+                row["min_age_months"] = minm
+                row["max_age_months"] = maxm
+                if not row.get("age_range_category") or row[
+                    "age_range_category"] not in AL_AGE_CAT:
+                        row["age_range_category"] = calc_age_category(
+                            minm, maxm)
+                return row
+
+        df = df.apply(fix_row, axis=1)
+
+        if PROMOTE_ON_IMPORT:
+                df.loc[:, "status"] = "live"
+
+        # ensure all required columns exist
+        missing = [c for c in COLS if c not in df.columns]
+        if missing:
+                raise SystemExit(f"Missing columns in sheet: {missing}")
+
+        # keep only the expected columns in order
+        df = df[COLS].copy()
+        return df
+
+
+# ---- end of baseline ----
+
+
+def cells(df):
+        """The frame as plain Python values, missing values as None."""
+        return [[None if v is None or (not isinstance(v, str) and pd.isna(v))
+                 else v for v in df[c].tolist()] for c in imp.COLS]
+
+
+def check(old, new, n):
+        if list(old.index) != list(new.index):
+                raise SystemExit(f"different rows kept at {n} rows")
+        for c, a, b in zip(imp.COLS, cells(old), cells(new)):
+                if a != b:
+                        i = next(i for i, (x, y) in enumerate(zip(a, b)) if x != y)
+                        raise SystemExit(f"{c} differs at {n} rows, row {i}: "
+                                         f"{a[i]!r} vs {b[i]!r}")
+        if repr(list(imp.encode_rows(old))) != repr(list(imp.encode_rows(new))):
+                raise SystemExit(f"encoded rows differ at {n} rows")
+
+
+def timed(fn, df):
+        t0 = time.perf_counter()
+        out = fn(df.copy())
+        return time.perf_counter() - t0, out
+
+
+if __name__ == "__main__":
+        sizes = SIZES
+        if imp.get_arg("--sizes"):
+                sizes = [int(s) for s in imp.get_arg("--sizes").split(",")]
+        dirty = float(imp.get_arg("--dirty", 0.1))
+        path = imp.get_arg("--sheet")
+
+        print(f"{'rows':>10} {'load_csv s':>11} {'normalize s':>12} "
+              f"{'speedup':>8}")
+        with tempfile.TemporaryDirectory() as tmp:
+                for n in sizes:
+                        if path:
+                                raw = pd.read_csv(path, nrows=n)
+                        else:
+                                raw = pd.read_csv(generate(
+                                    os.path.join(tmp, "sheet.csv"), n,
+                                    dirty=dirty))
+                        old_s, old = timed(load_csv, raw)
+                        new_s, new = timed(imp.normalize, raw)
+                        check(old, new, n)
+                        print(f"{n:>10} {old_s:>11.2f} {new_s:>12.2f} "
+                              f"{old_s / new_s:>7.1f}x")
@@ -0,0 +1,54 @@
+"""row_to_tuple over iterrows vs the columnar encode_rows.
+
+Normalizes a synthetic sheet (see synth.py), encodes it both ways, checks
+the tuples are identical (values and types) and prints the timings.
+
+    python bench/row_encoder.py
+    python bench/row_encoder.py --sizes 10000,100000 --dirty 0.3
+"""
+import os, sys, time, tempfile
+
+os.environ.setdefault("SHEET_CSV_URL", "")
+os.environ.setdefault("DATABASE_URL", "")
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import pandas as pd
+import import_from_sheet as imp
+from synth import generate
+
+SIZES = [100_000]
+
+
+def per_row(df):
+        return [imp.row_to_tuple(r) for _, r in df.iterrows()]
+
+
+def columnar(df):
+        return list(imp.encode_rows(df))
+
+
+def timed(fn, df):
+        t0 = time.perf_counter()
+        out = fn(df)
+        return time.perf_counter() - t0, out
+
+
+if __name__ == "__main__":
+        sizes = SIZES
+        if imp.get_arg("--sizes"):
+                sizes = [int(s) for s in imp.get_arg("--sizes").split(",")]
+        dirty = float(imp.get_arg("--dirty", 0.1))
+
+        print(f"{'rows':>10} {'iterrows s':>11} {'columnar s':>11} "
+              f"{'speedup':>8}")
+        with tempfile.TemporaryDirectory() as tmp:
+                for n in sizes:
+                        sheet = generate(os.path.join(tmp, "sheet.csv"), n,
+                                         dirty=dirty)
+                        df = imp.normalize(pd.read_csv(sheet))
+                        old_s, old = timed(per_row, df)
+                        new_s, new = timed(columnar, df)
+                        if repr(old) != repr(new):
+                                raise SystemExit(f"encoders disagree at {n} rows")
+                        print(f"{n:>10} {old_s:>11.2f} {new_s:>11.2f} "
+                              f"{old_s / new_s:>7.1f}x")
@@ -0,0 +1,77 @@
+"""Startup budget for the catalog scripts.
+
+Runs `python -X importtime` on the modules a CLI invocation loads before it
+does any work and fails (exit 1) if one takes longer than the budget, pulls
+in a heavy dependency eagerly or reads a data file (e.g. the age tables in
+src/data) at import time.
+
+    python bench/startup_time.py
+    STARTUP_BUDGET_MS=30 python bench/startup_time.py
+"""
+import os, sys, subprocess
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+BUDGET_MS = float(os.environ.get("STARTUP_BUDGET_MS") or 50)
+MODULES = ["import_from_sheet", "cli", "ddl_init", "ddl_reset"]
+HEAVY = {"pandas", "numpy", "requests", "psycopg2"}
+
+# Reports every file the import opens in the repo other than code
+WATCH_OPENS = """import sys
+def hook(event, args):
+        path = args[0] if event == "open" else None
+        if isinstance(path, str) and path.startswith(ROOT) and not path.endswith((".py", ".pyc")):
+                print("open: " + path, file=sys.stderr)
+sys.addaudithook(hook)
+"""
+
+
+def import_time(module):
+        """(cumulative microseconds, top-level packages loaded) for module."""
+        env = dict(os.environ, PYTHONPATH=ROOT)
+        out = subprocess.run([sys.executable, "-X", "importtime", "-c",
+                              f"import {module}"],
+                             cwd=ROOT, env=env, capture_output=True, text=True,
+                             check=True).stderr
+        total, loaded = None, set()
+        for line in out.splitlines():
+                if not line.startswith("import time:") or "|" not in line:
+                        continue
+                _, cumulative, name = [p.strip() for p in line[12:].split("|")]
+                if not cumulative.isdigit():
+                        continue
+                loaded.add(name.split(".")[0])
+                if name == module:
+                        total = int(cumulative)
+        return total, loaded
+
+
+def files_opened(module):
+        """Repo files other than code that importing module opens; a separate
+        run, since the audit hook would skew the timing."""
+        env = dict(os.environ, PYTHONPATH=ROOT)
+        code = f"ROOT = {os.path.realpath(ROOT)!r}\n{WATCH_OPENS}import {module}"
+        out = subprocess.run([sys.executable, "-c", code], cwd=ROOT, env=env,
+                             capture_output=True, text=True, check=True).stderr
+        return [os.path.relpath(line[6:], ROOT) for line in out.splitlines()
+                if line.startswith("open: ")]
+
+
+if __name__ == "__main__":
+        # measure warm starts even where PYTHONDONTWRITEBYTECODE is set
+        subprocess.run([sys.executable, "-m", "compileall", "-q",
+                        *[f"{m}.py" for m in MODULES], "product_schema.py",
+                        "age_reference.py"],
+                       cwd=ROOT, check=True)
+        failed = False
+        print(f"{'module':>20} {'ms':>7}  budget {BUDGET_MS:.0f}ms")
+        for module in MODULES:
+                us, loaded = import_time(module)
+                opened = files_opened(module)
+                heavy = sorted(HEAVY & loaded)
+                ok = us / 1000 <= BUDGET_MS and not heavy and not opened
+                failed |= not ok
+                note = f"  loads {', '.join(heavy)}" if heavy else ""
+                note += f"  reads {', '.join(opened)}" if opened else ""
+                print(f"{module:>20} {us / 1000:>7.1f}  "
+                      f"{'ok' if ok else 'OVER'}{note}")
+        sys.exit(1 if failed else 0)
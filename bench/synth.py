@@ -0,0 +1,128 @@
+"""Seeded synthetic product sheets shaped like the real Google Sheet export.
+
+Columns are import_from_sheet.COLS and every enum and multi-select value is
+drawn from its AL_* allowlist. A --dirty fraction of rows gets the kinds of
+mistakes editors make in the sheet: smart quotes and dashes, enum values
+outside the allowlist or with stray whitespace/case, unknown tags, min and
+max ages swapped, Google Drive share links, odd status spellings.
+
+    python bench/synth.py --rows 100000 --seed 1 --dirty 0.1 --out sheet.csv
+"""
+import os, sys, csv, random
+
+os.environ.setdefault("SHEET_CSV_URL", "")
+os.environ.setdefault("DATABASE_URL", "")
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import import_from_sheet as imp
+
+CATEGORIES = [
+    "Blocks", "Books", "Puzzles", "Art", "Music", "Dolls", "Vehicles",
+    "Outdoor", "Science", "Bath", "Sensory", "Fine Motor", "Gross Motor",
+    "Pretend Play", "Board Games", "Construction", "Plush", "Ride-Ons",
+    "Baby Gyms", "Stacking", "Shape Sorters", "Magnetic", "Costumes", "STEM"
+]
+
+BRANDS = ["Acme", "LEGO", "Melissa & Doug", "Fisher-Price", "Hape", "Plan Toys"]
+NOUNS = ["Blocks", "Puzzle", "Train Set", "Xylophone", "Doll House",
+         "Stacker", "Art Kit", "Ball Pit", "Puppet", "Robot"]
+SMART = ["’", "“", "”", "–", "—"]
+
+# (column, allowlist) for the single-select and multi-select fields
+ENUMS = list(imp.ENUM_ALLOWLISTS.items())
+MULTIS = [(c, sorted(al) if al else CATEGORIES)
+          for c, al in imp.MULTI_ALLOWLISTS.items()]
+
+
+def clean_row(i, rnd):
+        minm = rnd.choice([0, 3, 6, 12, 18, 24, 36, 48, 60, 84, 96])
+        maxm = minm + rnd.choice([6, 12, 24, 36, 60])
+        row = {
+            "id": f"p{i:07d}",
+            "name": f"{rnd.choice(NOUNS)} {i}",
+            "brand": rnd.choice(BRANDS),
+            "description": "A well made toy for curious kids. " *
+            rnd.randint(1, 6),
+            "price": f"{rnd.uniform(5, 250):.2f}",
+            "image_url": f"https://cdn.example.com/products/{i}.jpg",
+            "age_range": f"{minm}-{maxm} months",
+            "rating": f"{rnd.uniform(1, 5):.1f}",
+            "review_count": str(rnd.randint(0, 5000)),
+            "affiliate_url": f"https://shop.example.com/p/{i}",
+            "is_top_pick": rnd.choice(["TRUE", "FALSE", "FALSE", "FALSE"]),
+            "is_bestseller": rnd.choice(["TRUE", "FALSE", "FALSE"]),
+            "is_new": rnd.choice(["TRUE", "FALSE"]),
+            "min_age_months": str(minm),
+            "max_age_months": str(maxm),
+            "age_range_category": "",
+            "challenge_rating": str(rnd.randint(1, 5)),
+            "cooperation_required": rnd.choice(["TRUE", "FALSE"]),
+            "is_liza_toph_certified": rnd.choice(["TRUE", "FALSE", "FALSE"]),
+            "status": rnd.choice(["approved", "live", "live", "draft"]),
+        }
+        for c, al in ENUMS:
+                row[c] = rnd.choice(sorted(al))
+        row["age_range_category"] = rnd.choice(
+            ["", imp.calc_age_category(minm, maxm)])
+        for c, al in MULTIS:
+                row[c] = ", ".join(rnd.sample(al, rnd.randint(0, min(3, len(al)))))
+        return row
+
+
+def smart_quotes(row, rnd):
+        row["name"] = f"{rnd.choice(SMART)}{row['name']}{rnd.choice(SMART)}"
+        row["description"] = row["description"].replace(" ", rnd.choice(SMART), 2)
+
+
+def bad_enum(row, rnd):
+        c, al = rnd.choice(ENUMS)
+        row[c] = rnd.choice(["n/a", "TBD", f" {rnd.choice(sorted(al)).upper()} "])
+
+
+def bad_tags(row, rnd):
+        c, _ = rnd.choice(MULTIS)
+        row[c] = f"{row[c]},, unknown_tag ,{row[c]}"
+
+
+def swapped_ages(row, rnd):
+        row["min_age_months"], row["max_age_months"] = (row["max_age_months"],
+                                                        row["min_age_months"])
+
+
+def drive_url(row, rnd):
+        fid = "".join(rnd.choices("abcdefghijklmnopqrstuvwxyz0123456789", k=28))
+        row["image_url"] = rnd.choice([
+            f"https://drive.google.com/file/d/{fid}/view?usp=sharing",
+            f"https://drive.google.com/open?id={fid}",
+            f"https://drive.google.com/uc?export=view&id={fid}"
+        ])
+
+
+def odd_status(row, rnd):
+        row["status"] = rnd.choice(["Approved ", " LIVE", "", "archived"])
+
+
+DIRT = [smart_quotes, bad_enum, bad_tags, swapped_ages, drive_url, odd_status]
+
+
+def generate(path, rows, seed=0, dirty=0.1):
+        """Write a sheet of rows products to path; same seed, same file."""
+        rnd = random.Random(seed)
+        with open(path, "w", newline="", encoding="utf-8") as f:
+                w = csv.writer(f)
+                w.writerow(imp.COLS)
+                for i in range(rows):
+                        row = clean_row(i, rnd)
+                        if rnd.random() < dirty:
+                                for fn in rnd.sample(DIRT, rnd.randint(1, 3)):
+                                        fn(row, rnd)
+                        w.writerow([row[c] for c in imp.COLS])
+        return path
+
+
+if __name__ == "__main__":
+        out = imp.get_arg("--out", "sheet.csv")
+        generate(out, int(imp.get_arg("--rows", 1000)),
+                 int(imp.get_arg("--seed", 0)),
+                 float(imp.get_arg("--dirty", 0.1)))
+        print(f"wrote {out}")
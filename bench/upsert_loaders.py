@@ -0,0 +1,114 @@
+"""Compare the execute_values and COPY loaders of import_from_sheet.py.
+
+Point BENCH_DATABASE_URL at a throwaway database whose products table was
+created with ddl_reset.py -- every run TRUNCATEs it.
+
+    BENCH_DATABASE_URL=postgresql://localhost/bench python bench/upsert_loaders.py
+    BENCH_DATABASE_URL=... python bench/upsert_loaders.py --sizes 10000,100000
+"""
+import os, sys, time, random
+
+os.environ.setdefault("SHEET_CSV_URL", "")
+os.environ["DATABASE_URL"] = os.environ["BENCH_DATABASE_URL"]
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import psycopg2
+import import_from_sheet as imp
+from synth import CATEGORIES
+
+SIZES = [10_000, 100_000, 1_000_000]
+
+
+def fake_rows(n, seed=0):
+        """Normalized row tuples shaped like row_to_tuple output."""
+        rnd = random.Random(seed)
+
+        def pick(al):
+                return rnd.choice(sorted(al))
+
+        def tags(al):
+                return rnd.sample(sorted(al), rnd.randint(0, min(3, len(al))))
+
+        for i in range(n):
+                minm = rnd.choice([0, 6, 12, 24, 36, 60])
+                maxm = minm + rnd.choice([12, 24, 48])
+                row = {
+                    "id": f"bench-{i}",
+                    "name": f"Toy {i}",
+                    "brand": rnd.choice(["Acme", "Lego", "Melissa & Doug"]),
+                    "description": "A lovely toy. " * rnd.randint(1, 8),
+                    "price": round(rnd.uniform(5, 200), 2),
+                    "image_url": f"https://example.com/{i}.jpg",
+                    "categories": tags(CATEGORIES),
+                    "age_range": f"{minm}-{maxm} months",
+                    "rating": round(rnd.uniform(1, 5), 1),
+                    "review_count": rnd.randint(0, 5000),
+                    "affiliate_url": f"https://example.com/buy/{i}",
+                    "is_top_pick": rnd.random() < 0.1,
+                    "is_bestseller": rnd.random() < 0.1,
+                    "is_new": rnd.random() < 0.2,
+                    "min_age_months": minm,
+                    "max_age_months": maxm,
+                    "age_range_category": imp.calc_age_category(minm, maxm),
+                    "communication_levels": pick(imp.AL_DEV),
+                    "motor_levels": pick(imp.AL_DEV),
+                    "cognitive_levels": pick(imp.AL_DEV),
+                    "social_emotional_levels": pick(imp.AL_DEV),
+                    "play_type_tags": tags(imp.AL_PLAY),
+                    "complexity_level": pick(imp.AL_COMPLEX),
+                    "challenge_rating": rnd.randint(1, 5),
+                    "attention_duration": pick(imp.AL_ATTN),
+                    "stimulation_level": pick(imp.AL_STIM),
+                    "structure_preference": pick(imp.AL_STRUCT),
+                    "energy_requirement": pick(imp.AL_ENERGY),
+                    "sensory_compatibility": tags(imp.AL_SENS),
+                    "social_context": tags(imp.AL_SOC),
+                    "cooperation_required": rnd.random() < 0.3,
+                    "safety_considerations": tags(imp.AL_SAFE),
+                    "special_needs_support": tags(imp.AL_NEEDS),
+                    "intervention_focus": tags(imp.AL_INT),
+                    "noise_level": pick(imp.AL_NOISE),
+                    "mess_factor": pick(imp.AL_MESS),
+                    "setup_time": pick(imp.AL_SETUP),
+                    "space_requirements": pick(imp.AL_SPACE),
+                    "is_liza_toph_certified": rnd.random() < 0.05,
+                    "status": "live",
+                }
+                yield tuple(row[c] for c in imp.COLS)
+
+
+def timed_load(conn, loader, n, gen_s):
+        """Seconds spent loading n rows, minus the cost of generating them."""
+        imp.LOADER = loader
+        t0 = time.perf_counter()
+        with conn.cursor() as cur:
+                imp.write_rows(cur, fake_rows(n))
+        conn.commit()
+        return time.perf_counter() - t0 - gen_s
+
+
+if __name__ == "__main__":
+        sizes = SIZES
+        if imp.get_arg("--sizes"):
+                sizes = [int(s) for s in imp.get_arg("--sizes").split(",")]
+
+        print(f"{'rows':>10} {'loader':>7} {'insert s':>9} {'rows/s':>10} "
+              f"{'update s':>9} {'rows/s':>10}")
+        with psycopg2.connect(os.environ["BENCH_DATABASE_URL"]) as conn:
+                for n in sizes:
+                        t0 = time.perf_counter()
+                        for _ in fake_rows(n):
+                                pass
+                        gen_s = time.perf_counter() - t0
+                        for loader in ("values", "copy"):
+                                with conn.cursor() as cur:
+                                        cur.execute("TRUNCATE products;")
+                                conn.commit()
+                                ins = timed_load(conn, loader, n, gen_s)
+                                upd = timed_load(conn, loader, n, gen_s)
+                                print(f"{n:>10} {loader:>7} {ins:>9.2f} "
+                                      f"{n / ins:>10,.0f} {upd:>9.2f} "
+                                      f"{n / upd:>10,.0f}")
+                with conn.cursor() as cur:
+                        cur.execute("TRUNCATE products;")
+                conn.commit()
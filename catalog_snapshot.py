@@ -0,0 +1,152 @@
+"""Catalog snapshot of import_from_sheet.py (--snapshot / IMPORT_SNAPSHOT=true).
+
+After an import commits, the products table is written out as the JSON that
+GET /api/products returns, so the server can answer from files instead of
+Postgres (CATALOG_SNAPSHOT_DIR, see server/routes.ts):
+
+    <IMPORT_SNAPSHOT_DIR>/<target>/current.json     version, ETags, shard index
+    <IMPORT_SNAPSHOT_DIR>/<target>/<version>/products.json[.gz|.br]
+                                   <version>/age-range/<key>.json[.gz|.br]
+                                   <version>/category/<key>.json[.gz|.br]
+
+The version is a hash of products.json, so an unchanged catalog keeps its
+version and ETags. Brotli files are written when the brotli package is
+installed. The newest IMPORT_SNAPSHOT_KEEP versions are kept. An import
+without --snapshot removes current.json, as the files no longer match.
+"""
+import os, json, gzip, shutil, hashlib, time
+
+import import_from_sheet as imp
+from import_from_sheet import stage, count
+import product_schema
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+SNAPSHOT_DIR = os.environ.get("IMPORT_SNAPSHOT_DIR") or os.path.join(
+    ROOT, "snapshots", "catalog")
+KEEP = int(os.environ.get("IMPORT_SNAPSHOT_KEEP") or 3)
+
+# The columns DbStorage selects (shared/schema.ts), in API spelling
+API_COLUMNS = [c for c in product_schema.COLUMNS if c != "content_hash"]
+API_KEYS = [c.split("_")[0] + "".join(w.title() for w in c.split("_")[1:])
+            for c in API_COLUMNS]
+# numeric columns are declared text() in shared/schema.ts, so the API sends
+# them as strings the way Postgres prints them
+NUMERIC = {
+    i for i, c in enumerate(API_COLUMNS)
+    if product_schema.COLUMNS[c] == "numeric"
+}
+
+
+def to_json(products):
+        return json.dumps(products, ensure_ascii=False,
+                          separators=(",", ":")).encode()
+
+
+def shard_key(value):
+        return hashlib.sha256(value.encode()).hexdigest()[:16]
+
+
+def write_file(version_dir, rel, body, files):
+        """Write body and its compressed copies; record its ETag in files."""
+        path = os.path.join(version_dir, rel)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        encodings = ["gzip"]
+        with open(path, "wb") as f:
+                f.write(body)
+        with open(path + ".gz", "wb") as f:
+                f.write(gzip.compress(body, 9, mtime=0))
+        try:
+                import brotli
+        except ImportError:
+                brotli = None
+        if brotli:
+                with open(path + ".br", "wb") as f:
+                        f.write(brotli.compress(body))
+                encodings.append("br")
+        files[rel] = {
+            "etag": '"' + hashlib.sha256(body).hexdigest()[:20] + '"',
+            "bytes": len(body),
+            "encodings": encodings
+        }
+        count("snapshot.files")
+        count("snapshot.bytes", len(body))
+
+
+def prune(target_dir, current):
+        """Drop all but the newest KEEP version directories."""
+        versions = sorted(
+            (d for d in os.listdir(target_dir)
+             if d != current and os.path.isdir(os.path.join(target_dir, d))),
+            key=lambda d: os.path.getmtime(os.path.join(target_dir, d)))
+        for d in versions[:max(0, len(versions) - (KEEP - 1))]:
+                shutil.rmtree(os.path.join(target_dir, d), ignore_errors=True)
+
+
+def drop(target):
+        """Remove target's current.json so the server falls back to Postgres."""
+        index_path = os.path.join(SNAPSHOT_DIR, target, "current.json")
+        if os.path.exists(index_path):
+                os.remove(index_path)
+                print(f"   removed the {target} catalog snapshot (import without --snapshot)")
+
+
+def export(conn, target):
+        """Write the snapshot of imp.TABLE for target; returns its version."""
+        cols = ", ".join(f'"{c}"' for c in API_COLUMNS)
+        with stage("snapshot.query"), conn.cursor() as cur:
+                cur.execute(f"SELECT {cols} FROM {imp.TABLE} ORDER BY id;")
+                rows = cur.fetchall()
+
+        with stage("snapshot.build"):
+                products = []
+                by_age, by_category = {}, {}
+                for row in rows:
+                        values = [
+                            str(v) if i in NUMERIC and v is not None else v
+                            for i, v in enumerate(row)
+                        ]
+                        p = dict(zip(API_KEYS, values))
+                        products.append(p)
+                        if p["ageRange"] is not None:
+                                by_age.setdefault(p["ageRange"], []).append(p)
+                        for c in dict.fromkeys(p["categories"] or []):
+                                by_category.setdefault(c, []).append(p)
+                body = to_json(products)
+                version = hashlib.sha256(body).hexdigest()[:16]
+
+        target_dir = os.path.join(SNAPSHOT_DIR, target)
+        index_path = os.path.join(target_dir, "current.json")
+        version_dir = os.path.join(target_dir, version)
+        if os.path.exists(index_path) and os.path.isdir(version_dir):
+                with open(index_path) as f:
+                        if json.load(f).get("version") == version:
+                                print(f"   catalog snapshot {version} unchanged")
+                                return version
+
+        with stage("snapshot.write"):
+                tmp_dir = version_dir + ".part"
+                shutil.rmtree(tmp_dir, ignore_errors=True)
+                files = {}
+                write_file(tmp_dir, "products.json", body, files)
+                index = {
+                    "version": version,
+                    "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+                    "products": len(products),
+                    "files": files,
+                    "ageRange": {},
+                    "category": {}
+                }
+                for name, groups in (("ageRange", by_age), ("category", by_category)):
+                        folder = "age-range" if name == "ageRange" else "category"
+                        for value, group in groups.items():
+                                rel = f"{folder}/{shard_key(value)}.json"
+                                write_file(tmp_dir, rel, to_json(group), files)
+                                index[name][value] = rel
+                shutil.rmtree(version_dir, ignore_errors=True)
+                os.replace(tmp_dir, version_dir)
+                # the pointer moves last, so readers never see a partial version
+                imp.save_meta(index_path, index)
+                prune(target_dir, version)
+        print(f"   catalog snapshot {version}: {len(products)} products, "
+              f"{len(by_age)} age ranges, {len(by_category)} categories")
+        return version
@@ -0,0 +1,127 @@
+"""Command line entry point for the catalog scripts.
+
+    python cli.py import [--production] [--chunk-size N] [--workers N] ...
+    python cli.py validate [sheet.csv]
+    python cli.py ddl init
+    python cli.py ddl reset [--swap | --rollback]
+    python cli.py ddl reference [--load]
+    python cli.py serve [port]
+    python cli.py bench suite|loaders|categories|encoder|normalize [args...]
+
+Commands import what they need only when they run, so --help and usage
+errors return without loading pandas or psycopg2. Flags after a command are
+passed through to it unchanged.
+"""
+import os, sys, argparse
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+IMPORT_FLAGS = """\
+flags (also read by import_from_sheet.py directly):
+  --production, --prod     import into PRODUCTION_DATABASE_URL
+  --targets dev,prod       fetch once, write to several databases concurrently
+  --all-or-nothing         with --targets, commit only if every target succeeds
+  --chunk-size N           stream the sheet in chunks of N rows
+  --workers N              normalize chunks in N processes
+  --loader copy|values     how rows are written (default copy)
+  --delta                  only write rows whose content changed
+  --retire-missing         mark products missing from the sheet retired
+  --images                 store WebP/AVIF thumbnails, see image_cache.py
+  --snapshot               write the catalog JSON snapshot, see catalog_snapshot.py
+  --force                  import even if the sheet is unchanged
+  --dry-run [out.csv]      normalize and diff against the database, write nothing;
+                           rejected values and changes go to out.csv (dry_run.csv)
+  --report out.json        write stage timings and counters as JSON
+  --profile [out.prof]     dump cProfile stats
+"""
+
+BENCHES = {
+    "suite": "import_suite.py",
+    "loaders": "upsert_loaders.py",
+    "categories": "category_queries.py",
+    "encoder": "row_encoder.py",
+    "normalize": "normalize.py",
+}
+
+
+def run_import(args, rest):
+        import import_from_sheet as imp
+        return 0 if imp.run() in ("ok", "skipped") else 1
+
+
+def run_validate(args, rest):
+        import import_from_sheet as imp
+        imp.validate(args.path)
+        return 0
+
+
+def run_ddl(args, rest):
+        if args.action == "init":
+                import ddl_init
+                ddl_init.main()
+        elif args.action == "reference":
+                import age_reference
+                age_reference.main()
+        else:
+                import ddl_reset
+                ddl_reset.main()
+        return 0
+
+
+def run_serve(args, rest):
+        import import_worker
+        import_worker.serve(args.port or import_worker.imp.SERVE_PORT)
+        return 0
+
+
+def run_bench(args, rest):
+        import runpy
+        bench = os.path.join(ROOT, "bench")
+        sys.path.insert(0, bench)
+        sys.argv = [BENCHES[args.name], *rest]
+        runpy.run_path(os.path.join(bench, BENCHES[args.name]),
+                       run_name="__main__")
+        return 0
+
+
+def parser():
+        p = argparse.ArgumentParser(
+            prog="cli.py", description="Catalog import and schema tools.")
+        sub = p.add_subparsers(dest="command", required=True)
+
+        cmd = sub.add_parser(
+            "import",
+            help="import approved products from the sheet",
+            epilog=IMPORT_FLAGS,
+            formatter_class=argparse.RawDescriptionHelpFormatter)
+        cmd.set_defaults(run=run_import)
+
+        cmd = sub.add_parser(
+            "validate",
+            help="normalize the sheet and report what an import would drop")
+        cmd.add_argument("path", nargs="?",
+                         help="local CSV (default: fetch SHEET_CSV_URL)")
+        cmd.set_defaults(run=run_validate)
+
+        cmd = sub.add_parser("ddl", help="create, reset or blue/green reload the products table, "
+                             "or compile (and --load) the age band reference tables")
+        cmd.add_argument("action", choices=["init", "reset", "reference"])
+        cmd.set_defaults(run=run_ddl)
+
+        cmd = sub.add_parser("serve", help="run the warm import worker")
+        cmd.add_argument("port", nargs="?", type=int)
+        cmd.set_defaults(run=run_serve)
+
+        cmd = sub.add_parser("bench", help="run a benchmark from bench/")
+        cmd.add_argument("name", choices=sorted(BENCHES))
+        cmd.set_defaults(run=run_bench)
+        return p
+
+
+def main(argv=None):
+        args, rest = parser().parse_known_args(argv)
+        return args.run(args, rest)
+
+
+if __name__ == "__main__":
+        sys.exit(main())
@@ -361,9 +361,37 @@ export default function Admin() {
               <Download className="w-4 h-4 mr-2" />
               Import to Production Database
             </Button>
+
+            <Button
+              onClick={async () => {
+                if (!confirm('Import to BOTH databases? Production will update live data; neither database changes unless both imports succeed.')) {
+                  return;
+                }
+                try {
+                  await apiRequest('POST', '/api/admin/import-all');
+                  toast({ 
+                    title: 'Import Successful', 
+                    description: 'Development and production databases have been updated with the latest data from Google Sheets' 
+                  });
+                  queryClient.invalidateQueries({ queryKey: ['/api/admin/products'] });
+                } catch (error: any) {
+                  toast({ 
+                    title: 'Import Failed', 
+                    description: error.message || 'Failed to import data; neither database was changed',
+                    variant: 'destructive' 
+                  });
+                }
+              }}
+              variant="outline"
+              className="flex-1"
+              data-testid="button-import-all"
+            >
+              <Download className="w-4 h-4 mr-2" />
+              Import to Both
+            </Button>
           </div>
           <p className="text-sm text-muted-foreground mt-4">
-            Import product and professional data from the Google Sheets source. Development updates the local database, Production updates the live database.
+            Import product and professional data from the Google Sheets source. Development updates the local database, Production updates the live database, Both fetches the sheet once and updates the two together.
           </p>
         </CardContent>
       </Card>
@@ -12,6 +12,9 @@ import { Checkbox } from '@/components/ui/checkbox';
 import { useLocation } from 'wouter';
 import { parseNaturalLanguageQuery } from '@/lib/nlpParser';
 
+// Grid is 1/2/3/4 columns at the sm/lg/xl breakpoints; lets the browser pick a srcset width
+const GRID_IMAGE_SIZES = '(min-width: 1280px) 25vw, (min-width: 1024px) 33vw, (min-width: 640px) 50vw, 100vw';
+
 export default function Shop() {
   const { getActiveChild, savedItems, addSavedItem, removeSavedItem } = useStore();
   const child = getActiveChild();
@@ -764,15 +767,26 @@ const matchesAge = selectedAgeBrackets.length === 0 || (() => {
               data-testid={`card-product-${product.id}`}
             >
               <div className="aspect-square bg-ivory overflow-hidden relative">
-                <img
-                  src={product.imageUrl || 'https://placehold.co/400x400/EDE9DC/8B7355?text=No+Image'}
-                  alt={product.name}
-                  className="w-full h-full object-cover hover:scale-105 transition-transform duration-300"
-                  data-testid={`img-product-${product.id}`}
-                  onError={(e) => {
-                    e.currentTarget.src = 'https://placehold.co/400x400/EDE9DC/8B7355?text=No+Image';
-                  }}
-                />
+                <picture>
+                  {product.imageAvifSrcset && (
+                    <source type="image/avif" srcSet={product.imageAvifSrcset} sizes={GRID_IMAGE_SIZES} />
+                  )}
+                  <img
+                    src={product.imageSrc || product.imageUrl || 'https://placehold.co/400x400/EDE9DC/8B7355?text=No+Image'}
+                    srcSet={product.imageSrcset || undefined}
+                    sizes={GRID_IMAGE_SIZES}
+                    alt={product.name}
+                    loading="lazy"
+                    decoding="async"
+                    className="w-full h-full object-cover hover:scale-105 transition-transform duration-300"
+                    data-testid={`img-product-${product.id}`}
+                    onError={(e) => {
+                      e.currentTarget.parentElement?.querySelector('source')?.remove();
+                      e.currentTarget.removeAttribute('srcset');
+                      e.currentTarget.src = 'https://placehold.co/400x400/EDE9DC/8B7355?text=No+Image';
+                    }}
+                  />
+                </picture>
                 {/* Save Button */}
                 <button
                   onClick={(e) => handleSaveProduct(product, e)}
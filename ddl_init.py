@@ -1,54 +1,135 @@
-import os, psycopg2
-
-DB_URL = os.environ["DATABASE_URL"]
-
-DDL = [
-"CREATE TABLE IF NOT EXISTS products (id text PRIMARY KEY);",
-"ALTER TABLE products ADD COLUMN IF NOT EXISTS name text;",
-"ALTER TABLE products ADD COLUMN IF NOT EXISTS brand text;",
-"ALTER TABLE products ADD COLUMN IF NOT EXISTS description text;",
-"ALTER TABLE products ADD COLUMN IF NOT EXISTS price numeric;",
-"ALTER TABLE products ADD COLUMN IF NOT EXISTS image_url text;",
-"ALTER TABLE products ADD COLUMN IF NOT EXISTS categories text;",
-"ALTER TABLE products ADD COLUMN IF NOT EXISTS age_range text;",
-"ALTER TABLE products ADD COLUMN IF NOT EXISTS rating numeric;",
-"ALTER TABLE products ADD COLUMN IF NOT EXISTS review_count integer;",
-"ALTER TABLE products ADD COLUMN IF NOT EXISTS affiliate_url text;",
-"ALTER TABLE products ADD COLUMN IF NOT EXISTS is_top_pick boolean;",
-"ALTER TABLE products ADD COLUMN IF NOT EXISTS is_bestseller boolean;",
-"ALTER TABLE products ADD COLUMN IF NOT EXISTS is_new boolean;",
-"ALTER TABLE products ADD COLUMN IF NOT EXISTS min_age_months integer;",
-"ALTER TABLE products ADD COLUMN IF NOT EXISTS max_age_months integer;",
-"ALTER TABLE products ADD COLUMN IF NOT EXISTS age_range_category text;",
-"ALTER TABLE products ADD COLUMN IF NOT EXISTS communication_levels text;",
-"ALTER TABLE products ADD COLUMN IF NOT EXISTS motor_levels text;",
-"ALTER TABLE products ADD COLUMN IF NOT EXISTS cognitive_levels text;",
-"ALTER TABLE products ADD COLUMN IF NOT EXISTS social_emotional_levels text;",
-"ALTER TABLE products ADD COLUMN IF NOT EXISTS play_type_tags text;",
-"ALTER TABLE products ADD COLUMN IF NOT EXISTS complexity_level text;",
-"ALTER TABLE products ADD COLUMN IF NOT EXISTS challenge_rating integer;",
-"ALTER TABLE products ADD COLUMN IF NOT EXISTS attention_duration text;",
-"ALTER TABLE products ADD COLUMN IF NOT EXISTS stimulation_level text;",
-"ALTER TABLE products ADD COLUMN IF NOT EXISTS structure_preference text;",
-"ALTER TABLE products ADD COLUMN IF NOT EXISTS energy_requirement text;",
-"ALTER TABLE products ADD COLUMN IF NOT EXISTS sensory_compatibility text;",
-"ALTER TABLE products ADD COLUMN IF NOT EXISTS social_context text;",
-"ALTER TABLE products ADD COLUMN IF NOT EXISTS cooperation_required boolean;",
-"ALTER TABLE products ADD COLUMN IF NOT EXISTS safety_considerations text;",
-"ALTER TABLE products ADD COLUMN IF NOT EXISTS special_needs_support text;",
-"ALTER TABLE products ADD COLUMN IF NOT EXISTS intervention_focus text;",
-"ALTER TABLE products ADD COLUMN IF NOT EXISTS noise_level text;",
-"ALTER TABLE products ADD COLUMN IF NOT EXISTS mess_factor text;",
-"ALTER TABLE products ADD COLUMN IF NOT EXISTS setup_time text;",
-"ALTER TABLE products ADD COLUMN IF NOT EXISTS space_requirements text;",
-"ALTER TABLE products ADD COLUMN IF NOT EXISTS is_liza_toph_certified boolean;",
-"ALTER TABLE products ADD COLUMN IF NOT EXISTS status text;",
-"CREATE UNIQUE INDEX IF NOT EXISTS products_id_key ON products (id);"
-]
-
-with psycopg2.connect(DB_URL) as conn:
-    with conn.cursor() as cur:
-        for stmt in DDL:
-            cur.execute(stmt)
-    conn.commit()
-print("products table ready.")
+import os, json, hashlib
+
+from product_schema import COLUMNS, ARRAY_FIELDS, INDEXES, create_table
+
+# Give up instead of queueing behind (and blocking) live app queries
+LOCK_TIMEOUT = os.environ.get("DDL_LOCK_TIMEOUT") or "5s"
+
+
+def schema_version(columns):
+    """Identifies a schema (column types plus INDEXES) in schema_migrations."""
+    return hashlib.sha256(json.dumps([columns, INDEXES]).encode()).hexdigest()[:12]
+
+
+# The desired schema
+VERSION = schema_version(COLUMNS)
+
+# Tables earlier versions of the importer created and nothing reads any
+# more (the product_facets lookup); dropped by the migration
+OBSOLETE_TABLES = ["product_facets", "product_facets_next", "facet_bits"]
+
+# Everything the diff needs, in one round trip
+CATALOG = """SELECT
+  (SELECT coalesce(json_object_agg(column_name, CASE WHEN data_type = 'ARRAY'
+            THEN ltrim(udt_name, '_') || '[]' ELSE data_type END), '{}')
+     FROM information_schema.columns
+    WHERE table_schema = current_schema() AND table_name = 'products'),
+  (SELECT coalesce(json_agg(indexname), '[]')
+     FROM pg_indexes
+    WHERE schemaname = current_schema() AND tablename = 'products'),
+  (SELECT coalesce(json_agg(tablename), '[]')
+     FROM pg_tables
+    WHERE schemaname = current_schema() AND tablename = ANY(%s));"""
+
+MIGRATIONS_TABLE = """CREATE TABLE IF NOT EXISTS schema_migrations (
+  version text NOT NULL,
+  applied_at timestamptz NOT NULL DEFAULT now(),
+  statements text NOT NULL
+)"""
+
+# Legacy values are either "a, b" or array literals like {a,b}
+TO_ARRAY = """ALTER COLUMN {c} TYPE text[] USING CASE
+    WHEN {c} IS NULL THEN NULL
+    WHEN {c} LIKE '{{%}}' THEN {c}::text[]
+    ELSE array_remove(regexp_split_to_array(trim({c}), '\\s*,\\s*'), '')
+END"""
+
+
+def plan(columns, indexes, obsolete=()):
+    """Statements that bring products from what the catalog reports to the
+    spec in product_schema, notes on what is left alone, and the columns
+    that still differ from the spec afterwards ({name: actual type}).
+
+    columns maps name -> type as information_schema spells it ("text[]" for
+    arrays); indexes is the set of existing index names; obsolete lists the
+    OBSOLETE_TABLES that exist.
+    """
+    stmts, notes, pending = [], [], {}
+    if not columns:
+        stmts.append(create_table())
+    else:
+        # every column change goes into one ALTER TABLE: one lock, and at
+        # most one rewrite of the table
+        alter = [f"ADD COLUMN {c} {t}" for c, t in COLUMNS.items()
+                 if c not in columns]
+        # multi-select columns created as plain text are converted in place:
+        # the app and the importer both expect text[]
+        legacy = [c for c in ARRAY_FIELDS
+                  if c in columns and columns[c] != "text[]"]
+        if legacy:
+            alter += [TO_ARRAY.format(c=c) for c in legacy]
+            notes.append(f"converting to text[]: {', '.join(legacy)}")
+        for c, t in COLUMNS.items():
+            if c in columns and columns[c] != t and c not in legacy:
+                notes.append(f"{c} is {columns[c]}, spec says {t}; left as is")
+                pending[c] = columns[c]
+        if alter:
+            stmts.append("ALTER TABLE products " + ", ".join(alter))
+    stmts += [ddl for name, _, ddl in INDEXES if name not in indexes]
+    if obsolete:
+        stmts.append("DROP TABLE IF EXISTS " + ", ".join(obsolete))
+    return stmts, notes, pending
+
+
+def migrate(cur):
+    """Apply the plan in the caller's transaction; returns (whether anything
+    changed, the version of the schema the table now has).
+
+    The statements, the lock_timeout and the schema_migrations record go to
+    the server as a single script, so a migration is one round trip after
+    the catalog query, and an up-to-date schema costs only that query. The
+    record names the schema actually reached: VERSION only if no column was
+    left differing from the spec.
+    """
+    cur.execute(CATALOG, (OBSOLETE_TABLES, ))
+    columns, indexes, obsolete = cur.fetchone()
+    stmts, notes, pending = plan(columns, set(indexes), obsolete)
+    for note in notes:
+        print(note)
+    version = schema_version({**COLUMNS, **pending}) if pending else VERSION
+    if not stmts:
+        return False, version
+    record = cur.mogrify(
+        "INSERT INTO schema_migrations (version, statements) VALUES (%s, %s)",
+        (version, ";\n".join(stmts) + ";")).decode()
+    script = [f"SET LOCAL lock_timeout = '{LOCK_TIMEOUT}'", *stmts,
+              MIGRATIONS_TABLE, record]
+    cur.execute(";\n".join(script) + ";")
+    for stmt in stmts:
+        print(stmt.split(" (")[0] if stmt.startswith(("CREATE", "DROP")) else
+              f"ALTER TABLE products: {stmt.count(', ADD COLUMN') + stmt.count(', ALTER COLUMN') + 1} column change(s)")
+    return True, version
+
+
+def main():
+    import psycopg2
+    import psycopg2.errors
+
+    with psycopg2.connect(os.environ["DATABASE_URL"]) as conn:
+        with conn.cursor() as cur:
+            try:
+                changed, version = migrate(cur)
+            except psycopg2.errors.LockNotAvailable:
+                conn.rollback()
+                raise SystemExit(
+                    f"products is busy (no lock within {LOCK_TIMEOUT}); nothing changed, try again")
+        conn.commit()
+    if version != VERSION:
+        print(f"products table at schema {version}{', migrated' if changed else ''}, "
+              f"not the spec's {VERSION}: fix the columns noted above.")
+    else:
+        print(f"products table ready (schema {VERSION}{', migrated' if changed else ''}).")
+
+
+if __name__ == "__main__":
+    main()
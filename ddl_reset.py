@@ -1,54 +1,200 @@
-import os, psycopg2
-DB_URL = os.environ["DATABASE_URL"]
-DDL = """
-DROP TABLE IF EXISTS products;
-CREATE TABLE products (
-  id text PRIMARY KEY,
-  name text,
-  brand text,
-  description text,
-  price numeric,
-  image_url text,
-  categories text,
-  age_range text,
-  rating numeric,
-  review_count integer,
-  affiliate_url text,
-  is_top_pick boolean,
-  is_bestseller boolean,
-  is_new boolean,
-  min_age_months integer,
-  max_age_months integer,
-  age_range_category text,
-  communication_levels text,
-  motor_levels text,
-  cognitive_levels text,
-  social_emotional_levels text,
-  play_type_tags text,
-  complexity_level text,
-  challenge_rating integer,
-  attention_duration text,
-  stimulation_level text,
-  structure_preference text,
-  energy_requirement text,
-  sensory_compatibility text,
-  social_context text,
-  cooperation_required boolean,
-  safety_considerations text,
-  special_needs_support text,
-  intervention_focus text,
-  noise_level text,
-  mess_factor text,
-  setup_time text,
-  space_requirements text,
-  is_liza_toph_certified boolean,
-  status text
-);
-CREATE UNIQUE INDEX IF NOT EXISTS products_id_key ON products (id);
+"""Recreate the products table.
+
+    python ddl_reset.py             drop and recreate products (empty)
+    python ddl_reset.py --swap      blue/green reload: load the sheet into
+                                    products_next, check it, rename it into
+                                    place and keep the old table as
+                                    products_prev
+    python ddl_reset.py --rollback  swap products_prev back in
+
+--swap and --rollback take the import flags (--production, --chunk-size,
+--workers, --snapshot, ...).
+The live table is only locked for the renames, which run as one short
+transaction under DDL_LOCK_TIMEOUT; until then the site keeps serving the
+current catalog. The load is refused if products_next has no rows or fewer
+than RESET_MAX_SHRINK (default 0.2) below the approved/live rows in products,
+unless --force. Views and foreign keys follow the renamed table, so anything
+defined on products must be recreated after a swap.
 """
-with psycopg2.connect(DB_URL) as conn:
-    with conn.cursor() as cur:
-        for stmt in [s.strip() for s in DDL.split(";\n") if s.strip()]:
-            cur.execute(stmt + ";")
-    conn.commit()
-print("products table reset on built-in DB.")
+import os, sys, time
+
+from product_schema import create_table, indexes
+from ddl_init import LOCK_TIMEOUT
+
+SWAP = "--swap" in sys.argv
+ROLLBACK = "--rollback" in sys.argv
+FORCE = "--force" in sys.argv
+MAX_SHRINK = float(os.environ.get("RESET_MAX_SHRINK") or 0.2)
+
+LIVE, NEXT, PREV = "products", "products_next", "products_prev"
+
+# Indexes of the three generations, in one round trip
+GENERATIONS = """SELECT t, to_regclass(t) IS NOT NULL,
+       coalesce((SELECT json_agg(indexname) FROM pg_indexes
+                  WHERE schemaname = current_schema() AND tablename = t), '[]')
+  FROM unnest(%s::text[]) t"""
+
+
+def rename(old, new, names):
+    """Statements renaming table old to new along with the indexes named
+    after it (products_id_key -> products_prev_id_key), and the new names."""
+    stmts = [f"ALTER TABLE {old} RENAME TO {new}"]
+    renamed = []
+    for name in names:
+        if name.startswith(old + "_"):
+            renamed.append(new + name[len(old):])
+            stmts.append(f"ALTER INDEX {name} RENAME TO {renamed[-1]}")
+        else:
+            renamed.append(name)
+    return stmts, renamed
+
+
+def generations(cur):
+    """{table: index names} for whichever of products, _next, _prev exist."""
+    cur.execute(GENERATIONS, ([LIVE, NEXT, PREV], ))
+    return {t: names for t, exists, names in cur.fetchall() if exists}
+
+
+def swap_script(tables):
+    """One script putting products_next live and products in _prev."""
+    stmts = [f"SET LOCAL lock_timeout = '{LOCK_TIMEOUT}'"]
+    if PREV in tables:
+        stmts.append(f"DROP TABLE {PREV}")
+    if LIVE in tables:
+        stmts += rename(LIVE, PREV, tables[LIVE])[0]
+    stmts += rename(NEXT, LIVE, tables[NEXT])[0]
+    return ";\n".join(stmts) + ";"
+
+
+def rollback_script(tables):
+    """One script exchanging products and products_prev."""
+    hold = "products_rollback"
+    stmts = [f"SET LOCAL lock_timeout = '{LOCK_TIMEOUT}'"]
+    held, names = rename(LIVE, hold, tables[LIVE])
+    stmts += held
+    stmts += rename(PREV, LIVE, tables[PREV])[0]
+    stmts += rename(hold, PREV, names)[0]
+    return ";\n".join(stmts) + ";"
+
+
+def check_counts(cur, tables):
+    """Refuse a products_next that would shrink the catalog suspiciously."""
+    cur.execute(f"SELECT count(*) FROM {NEXT}")
+    loaded = cur.fetchone()[0]
+    live = 0
+    if LIVE in tables:
+        cur.execute(
+            f"SELECT count(*) FROM {LIVE} WHERE status IN ('approved', 'live')")
+        live = cur.fetchone()[0]
+    print(f"{NEXT}: {loaded} rows, {LIVE}: {live} approved/live rows")
+    if FORCE:
+        return
+    if not loaded:
+        raise SystemExit(f"{NEXT} is empty; {LIVE} left as is")
+    if loaded < live * (1 - MAX_SHRINK):
+        raise SystemExit(
+            f"{NEXT} has {live - loaded} fewer products than {LIVE} "
+            f"(more than {MAX_SHRINK:.0%}); {LIVE} left as is, "
+            f"rerun with --force to swap anyway")
+
+
+def reset():
+    import psycopg2
+    import import_from_sheet as imp
+
+    with psycopg2.connect(os.environ["DATABASE_URL"]) as conn:
+        with conn.cursor() as cur:
+            cur.execute(f"DROP TABLE IF EXISTS {LIVE}")
+            cur.execute(create_table(LIVE))
+            for _, _, ddl in indexes(LIVE):
+                cur.execute(ddl)
+        conn.commit()
+    # the table is empty: the next import must not skip an unchanged sheet
+    imp.forget_imported(os.environ["DATABASE_URL"])
+    print("products table reset on built-in DB.")
+
+
+def swap():
+    import import_from_sheet as imp
+    import psycopg2.errors
+
+    imp.check_settings()
+    print(f"\nFetching data from CSV...")
+    sheet = imp.fetch_sheet(imp.CSV_URL)
+
+    # products_prev is two generations old once this load succeeds, and a
+    # failed earlier run may have left products_next behind
+    with imp.db_conn() as conn:
+        with conn.cursor() as cur:
+            cur.execute(f"DROP TABLE IF EXISTS {NEXT}")
+            cur.execute(create_table(NEXT))
+        conn.commit()
+
+    # a full load into an empty table: no delta
+    imp.TABLE, imp.DELTA, imp.RETIRE_MISSING = NEXT, False, False
+    try:
+        imp.load_sheet(sheet["path"])
+    finally:
+        imp.TABLE = LIVE
+
+    with imp.db_conn() as conn:
+        with conn.cursor() as cur:
+            started = time.perf_counter()
+            for _, _, ddl in indexes(NEXT):
+                cur.execute(ddl)
+            cur.execute(f"ANALYZE {NEXT}")
+            conn.commit()
+            print(f"{NEXT} indexed in {time.perf_counter() - started:.2f}s")
+
+            tables = generations(cur)
+            check_counts(cur, tables)
+            started = time.perf_counter()
+            try:
+                cur.execute(swap_script(tables))
+            except psycopg2.errors.LockNotAvailable:
+                conn.rollback()
+                raise SystemExit(
+                    f"products is busy (no lock within {LOCK_TIMEOUT}); "
+                    f"{NEXT} is loaded, run --swap again")
+            conn.commit()
+            print(f"{NEXT} swapped in as {LIVE} in "
+                  f"{(time.perf_counter() - started) * 1000:.0f}ms"
+                  + (f"; previous catalog kept as {PREV}" if LIVE in tables else ""))
+    imp.update_snapshot()
+    # products now holds this sheet and nothing another cached sheet wrote
+    imp.forget_imported()
+    imp.mark_imported(sheet)
+
+
+def rollback():
+    import import_from_sheet as imp
+    import psycopg2.errors
+
+    with imp.db_conn() as conn:
+        with conn.cursor() as cur:
+            tables = generations(cur)
+            if PREV not in tables or LIVE not in tables:
+                raise SystemExit(f"no {PREV} to roll back to")
+            try:
+                cur.execute(rollback_script(tables))
+            except psycopg2.errors.LockNotAvailable:
+                conn.rollback()
+                raise SystemExit(
+                    f"products is busy (no lock within {LOCK_TIMEOUT}); nothing changed, try again")
+            conn.commit()
+            print(f"previous catalog is live again; the rolled back one is now {PREV}.")
+    imp.forget_imported()
+    imp.update_snapshot()
+
+
+def main():
+    if ROLLBACK:
+        rollback()
+    elif SWAP:
+        swap()
+    else:
+        reset()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,306 @@
+"""Dry run of import_from_sheet.py (--dry-run [out.csv] / IMPORT_DRY_RUN=true).
+
+Normalizes the sheet exactly as an import would and reports, without writing
+anything:
+
+  * every value the normalization rejects or rewrites: enum values outside
+    their allowlist (blanked), unknown multi-select tags (dropped), numbers
+    and booleans that do not parse (NULL), max_age_months below
+    min_age_months (set to the minimum), unknown age_range_category labels
+    (recomputed), blank and repeated ids;
+  * a diff against the target database: new products, changed columns and
+    approved/live products the sheet no longer has. The current rows are
+    read with one SELECT in a read-only transaction.
+
+The details go to a CSV with one line per sheet row and column:
+
+    target, row, id, column, change, value, detail
+
+where row is the sheet row (the header is row 1), change is rejected, new,
+changed or missing, value is the sheet value and detail the reason or, for
+changed, the database value. Counts are printed and added to the --report
+counters (dry_run.*).
+"""
+import os, csv
+
+import pandas as pd
+
+import import_from_sheet as imp
+from import_from_sheet import stage, count
+
+FIELDS = ["target", "row", "id", "column", "change", "value", "detail"]
+
+# columns shown per kind of change before the rest are only counted
+MAX_COLUMNS_SHOWN = 10
+
+
+def show(v):
+        """A cell or row_to_tuple value as CSV text."""
+        if v is None or (not isinstance(v, (list, str)) and pd.isna(v)):
+                return ""
+        if isinstance(v, list):
+                return ", ".join(v)
+        return str(v)
+
+
+def blank(v):
+        return pd.isna(v) or str(v).strip() == ""
+
+
+def enum_issue(allowed):
+        def issue(v):
+                if blank(v) or imp.norm_text(v).strip() in allowed:
+                        return None
+                return "not an allowed value; blanked"
+        return issue
+
+
+def tags_issue(allowed):
+        def issue(v):
+                if blank(v):
+                        return None
+                tags = (t.strip() for t in imp.norm_text(v).split(","))
+                unknown = list(dict.fromkeys(t for t in tags if t and t not in allowed))
+                return f"unknown tags dropped: {', '.join(unknown)}" if unknown else None
+        return issue
+
+
+def number_issue(is_int):
+        def issue(v):
+                if blank(v):
+                        return None
+                n = imp.to_num(v)
+                if n is None:
+                        return "not a number; stored as NULL"
+                if is_int and n != int(n):
+                        return f"not a whole number; stored as {int(n)}"
+                return None
+        return issue
+
+
+def bool_issue(v):
+        if blank(v) or imp.to_bool(v) is not None:
+                return None
+        return "not true/false; stored as NULL"
+
+
+def cell_issues():
+        """(column, scalar check) pairs; a check returns the issue or None."""
+        checks = []
+        for c, t in imp.COL_TYPES.items():
+                if c in imp.ENUM_ALLOWLISTS:
+                        checks.append((c, enum_issue(imp.ENUM_ALLOWLISTS[c])))
+                elif imp.MULTI_ALLOWLISTS.get(c) is not None:
+                        checks.append((c, tags_issue(imp.MULTI_ALLOWLISTS[c])))
+                elif t in ("num", "int"):
+                        checks.append((c, number_issue(t == "int")))
+                elif t == "bool":
+                        checks.append((c, bool_issue))
+        return checks
+
+
+def frame(raw, mask, column, detail):
+        """Rejection lines for the rows of raw selected by mask."""
+        rows = raw.index[mask]
+        return pd.DataFrame({
+            "row": rows + 2,
+            "id": raw.loc[rows, "id"].map(show).to_numpy(),
+            "column": column,
+            "change": "rejected",
+            "value": raw.loc[rows, column].map(show).to_numpy(),
+            "detail": detail,
+        })
+
+
+def rejections(raw, df):
+        """What normalize() rejected or rewrote in the approved rows of raw.
+
+        raw is the sheet as read, df the normalized frame (same index). Each
+        check runs once per distinct value of its column.
+        """
+        raw = raw.loc[df.index]
+        found = []
+        with stage("dry_run.rejections"):
+                for c, issue in cell_issues():
+                        if c not in raw:
+                                continue
+                        reasons = imp.map_unique(raw[c], issue)
+                        mask = reasons.notna().to_numpy()
+                        if mask.any():
+                                found.append(frame(raw, mask, c, reasons[mask].to_numpy()))
+
+                minm = df["min_age_months"].astype("float64").to_numpy()
+                maxm = imp.map_unique(raw["max_age_months"], imp.to_int_or_none)
+                maxm = maxm.astype("float64").to_numpy()
+                mask = maxm < minm
+                if mask.any():
+                        found.append(frame(raw, mask, "max_age_months", [
+                            f"below min_age_months; set to {int(m)}" for m in minm[mask]]))
+
+                if "age_range_category" in raw:
+                        label = imp.map_unique(
+                            raw["age_range_category"],
+                            lambda v: None if blank(v) else imp.norm_text(v))
+                        mask = (label.notna() & ~label.isin(imp.age_tables().allowed)).to_numpy()
+                        if mask.any():
+                                found.append(frame(raw, mask, "age_range_category", [
+                                    f"not a known age band; replaced by {v!r}" if v else
+                                    "not a known age band; blanked (no ages to compute one from)"
+                                    for v in df["age_range_category"].to_numpy()[mask]]))
+
+                ids = df["id"]
+                mask = (ids.isna() | (ids == "")).to_numpy()
+                if mask.any():
+                        found.append(frame(raw, mask, "id", "blank; the import would fail"))
+                mask = ids.duplicated(keep="last").to_numpy() & ~mask
+                if mask.any():
+                        last = {i: r + 2 for r, i in zip(df.index, ids)}
+                        found.append(frame(raw, mask, "id", [
+                            f"repeated in row {last[i]}, which wins" for i in ids.to_numpy()[mask]]))
+
+        if not found:
+                return pd.DataFrame(columns=FIELDS[1:])
+        return pd.concat(found, ignore_index=True).sort_values(
+            ["row", "column"], kind="stable", ignore_index=True)
+
+
+# Postgres quotes an array element that is empty, NULL or contains these
+ARRAY_SPECIAL = set('{}",\\ \t\n\r\v\f')
+
+
+def array_element(t):
+        if t and t.upper() != "NULL" and not ARRAY_SPECIAL.intersection(t):
+                return t
+        return '"' + t.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+def array_text(items):
+        """A row_to_tuple list as Postgres prints the text[] value."""
+        return "{" + ",".join(map(array_element, items)) + "}"
+
+
+# How the sheet and database sides are put in the same shape: text[] is
+# compared as text, since parsing arrays costs more than the whole rest of
+# the SELECT, and numeric as float8, the encoded floats
+SELECT_CASTS = {"array": "::text" if imp.MULTI_SELECT_AS_ARRAYS else "", "num": "::float8"}
+ENCODERS = [
+    (c, (lambda v: array_text(imp.array_value(v))) if t == "array" and imp.MULTI_SELECT_AS_ARRAYS
+     else imp.VALUE_ENCODERS[t]) for c, t in imp.COL_TYPES.items()
+]
+
+
+def select_sql():
+        cols = ", ".join(f'"{c}"{SELECT_CASTS.get(t, "")}'
+                         for c, t in imp.COL_TYPES.items())
+        return f"SELECT {cols} FROM {imp.TABLE};"
+
+
+def current_rows(dsn):
+        """{id: row tuple} of the target, read in a read-only transaction."""
+        with imp.db_conn(dsn) as conn:
+                try:
+                        with stage("dry_run.select"), conn.cursor() as cur:
+                                cur.execute("SET TRANSACTION READ ONLY;")
+                                cur.execute(select_sql())
+                                return {r[0]: r for r in cur.fetchall()}
+                finally:
+                        conn.rollback()
+
+
+def diff(target, rows, current):
+        """Diff lines for the encoded sheet rows against current; returns
+        {"new", "changed", "unchanged", "missing"} counts and changed columns."""
+        summary = {"new": 0, "changed": 0, "unchanged": 0, "missing": 0, "columns": {}}
+        with stage("dry_run.diff"):
+                out = []
+                for t, row in zip(rows, rows.lines):
+                        old = current.get(t[0])
+                        if old is None:
+                                summary["new"] += 1
+                                out.append((target, row, t[0], "", "new", "", ""))
+                        elif old == t:
+                                summary["unchanged"] += 1
+                        else:
+                                summary["changed"] += 1
+                                for c, v, was in zip(imp.COLS, t, old):
+                                        if v != was:
+                                                summary["columns"][c] = summary["columns"].get(c, 0) + 1
+                                                out.append((target, row, t[0], c, "changed", show(v), show(was)))
+                status = imp.COLS.index("status")
+                for i, old in current.items():
+                        if i not in rows.ids and old[status] in ("approved", "live"):
+                                summary["missing"] += 1
+                                out.append((target, "", i, "", "missing", "",
+                                            "approved/live in the database, not in the sheet"))
+        return summary, out
+
+
+class SheetRows(list):
+        """Encoded sheet rows (ENCODERS), the last one per id as an import
+        keeps it; lines holds their sheet rows."""
+
+        def __init__(self, df):
+                with stage("encode"):
+                        last = {}
+                        columns = (imp.map_unique(df[c], fn).tolist() for c, fn in ENCODERS)
+                        for t, r in zip(zip(*columns), df.index):
+                                last[t[0]] = (t, r + 2)
+                super().__init__(t for t, _ in last.values())
+                self.lines = [r for _, r in last.values()]
+                self.ids = set(last)
+
+
+def write_csv(path, rejected, diffs):
+        tmp = path + ".part"
+        with open(tmp, "w", newline="") as f:
+                w = csv.writer(f)
+                w.writerow(FIELDS)
+                rejected.reindex(columns=FIELDS, fill_value="").to_csv(
+                    f, header=False, index=False)
+                for lines in diffs:
+                        w.writerows(lines)
+        os.replace(tmp, path)
+
+
+def top(columns):
+        shown = sorted(columns.items(), key=lambda kv: -kv[1])
+        text = ", ".join(f"{c} {n}" for c, n in shown[:MAX_COLUMNS_SHOWN])
+        if len(shown) > MAX_COLUMNS_SHOWN:
+                text += f", {len(shown) - MAX_COLUMNS_SHOWN} more"
+        return text
+
+
+def run(path, targets, report_path=None):
+        """Dry-run the downloaded sheet at path against {name: dsn} targets."""
+        with stage("parse"):
+                raw = pd.read_csv(path)
+        df = imp.normalize(raw)
+        rejected = rejections(raw, df)
+        counters = imp.METRICS["counters"]
+        print(f"{counters['rows.read']} rows read, {len(df)} approved/live")
+        count("dry_run.rejected", len(rejected))
+        if len(rejected):
+                print(f"⚠️  {len(rejected)} values rejected or rewritten in "
+                      f"{rejected['row'].nunique()} rows: "
+                      f"{top(rejected['column'].value_counts().to_dict())}")
+        else:
+                print("No values rejected")
+
+        rows = SheetRows(df)
+        diffs = []
+        for name, dsn in targets.items():
+                summary, lines = diff(name, rows, current_rows(dsn))
+                diffs.append(lines)
+                for k in ("new", "changed", "unchanged", "missing"):
+                        count(f"dry_run.{name}.{k}", summary[k])
+                print(f"{name}: {summary['new']} new, {summary['changed']} changed, "
+                      f"{summary['unchanged']} unchanged, {summary['missing']} approved/live "
+                      f"products not in the sheet")
+                if summary["columns"]:
+                        print(f"   changed columns: {top(summary['columns'])}")
+
+        if report_path:
+                with stage("dry_run.write"):
+                        write_csv(report_path, rejected, diffs)
+                print(f"Dry run details written to {report_path}")
+        print("Nothing was written to the database.")
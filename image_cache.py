@@ -0,0 +1,196 @@
+"""Image stage of import_from_sheet.py (--images / IMPORT_IMAGES=true).
+
+Downloads each distinct product image once, with at most
+IMPORT_IMAGE_CONCURRENCY requests in flight, and stores pre-sized variants in
+a content-addressed store:
+
+    <IMPORT_IMAGE_DIR>/<sha256[:2]>/<sha256>-<width>.<webp|avif>
+
+The app serves the store under IMPORT_IMAGE_URL (default /uploads/products),
+and the import writes image_src, image_srcset and image_avif_srcset for each
+product. manifest.json in the store keeps the ETag, Last-Modified and content
+hash of every source, so later runs revalidate instead of downloading, and
+bytes that were already encoded (under any URL) are not encoded again.
+
+Needs Pillow; AVIF variants are skipped if Pillow was built without AVIF.
+"""
+import os, io, json, hashlib
+from urllib.parse import urlsplit, parse_qs
+from concurrent.futures import ThreadPoolExecutor
+
+import import_from_sheet as imp
+from import_from_sheet import stage, count
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+IMAGE_DIR = os.environ.get("IMPORT_IMAGE_DIR") or os.path.join(
+    ROOT, "uploads", "products")
+IMAGE_URL = (os.environ.get("IMPORT_IMAGE_URL") or "/uploads/products").rstrip("/")
+WIDTHS = sorted(int(w) for w in (os.environ.get("IMPORT_IMAGE_WIDTHS")
+                                 or "320,640,1000").split(","))
+# image_src is the smallest variant at least this wide
+SRC_WIDTH = int(os.environ.get("IMPORT_IMAGE_SRC_WIDTH") or 640)
+FORMATS = (os.environ.get("IMPORT_IMAGE_FORMATS") or "webp,avif").split(",")
+QUALITY = {"webp": 80, "avif": 60}
+CONCURRENCY = int(os.environ.get("IMPORT_IMAGE_CONCURRENCY") or 8)
+
+# failures printed one by one before the rest are only counted
+MAX_ERRORS_SHOWN = 10
+
+
+def source_key(url):
+        """Drive links to one file (share, uc and thumbnail URLs) are one image."""
+        parts = urlsplit(url)
+        if parts.netloc.endswith("drive.google.com"):
+                if "/file/d/" in parts.path:
+                        return "drive:" + parts.path.split("/file/d/")[1].split("/")[0]
+                ids = parse_qs(parts.query).get("id")
+                if ids:
+                        return "drive:" + ids[0]
+        return url
+
+
+def variant_path(sha, width, fmt):
+        return f"{sha[:2]}/{sha}-{width}.{fmt}"
+
+
+def variant_widths(width):
+        """Widths to produce for an image width px wide; never upscaled."""
+        return sorted({min(w, width) for w in WIDTHS})
+
+
+def encode(sha, body, formats):
+        """Write the missing variants of one image; {format: [[width, path]]}."""
+        from PIL import Image, ImageOps
+
+        img = Image.open(io.BytesIO(body))
+        widths = variant_widths(img.width)
+        variants = {f: [[w, variant_path(sha, w, f)] for w in widths] for f in formats}
+        todo = [(w, p, f) for f in formats for w, p in variants[f]
+                if not os.path.exists(os.path.join(IMAGE_DIR, p))]
+        if not todo:
+                return variants, False
+        img = ImageOps.exif_transpose(img)
+        img = img.convert("RGBA" if "A" in img.getbands() else "RGB")
+        os.makedirs(os.path.join(IMAGE_DIR, sha[:2]), exist_ok=True)
+        for w, p, f in todo:
+                h = max(1, round(img.height * w / img.width))
+                sized = img if w == img.width else img.resize((w, h), Image.LANCZOS)
+                path = os.path.join(IMAGE_DIR, p)
+                sized.save(path + ".part", format=f.upper(), quality=QUALITY.get(f, 75))
+                os.replace(path + ".part", path)
+        return variants, True
+
+
+def resolve(url, entry, formats):
+        """Fetch one source and bring its variants up to date.
+
+        Returns (manifest entry, outcome) where outcome is not_modified,
+        unchanged (same bytes, files present) or encoded.
+        """
+        # revalidate only when the entry has every format: a 304 has no body
+        # to encode the missing ones from
+        headers = {}
+        if set(entry.get("variants", {})) == set(formats):
+                if entry.get("etag"):
+                        headers["If-None-Match"] = entry["etag"]
+                if entry.get("last_modified"):
+                        headers["If-Modified-Since"] = entry["last_modified"]
+        r = imp.get_with_retry(url, headers)
+        if r.status_code == 304:
+                return entry, "not_modified"
+        body = r.content
+        sha = hashlib.sha256(body).hexdigest()
+        variants, encoded = encode(sha, body, formats)
+        return {
+            "url": url,
+            "etag": r.headers.get("ETag"),
+            "last_modified": r.headers.get("Last-Modified"),
+            "sha256": sha,
+            "variants": variants,
+        }, "encoded" if encoded else "unchanged"
+
+
+def srcset(variants):
+        return ", ".join(f"{IMAGE_URL}/{p} {w}w" for w, p in variants) or None
+
+
+def image_columns(entry, formats):
+        """(image_src, image_srcset, image_avif_srcset) for a manifest entry."""
+        variants = entry["variants"]
+        main = variants[formats[0]]
+        src = next((p for w, p in main if w >= SRC_WIDTH), main[-1][1])
+        return (f"{IMAGE_URL}/{src}",
+                srcset(variants.get("webp", [])),
+                srcset(variants.get("avif", [])))
+
+
+def supported_formats():
+        try:
+                from PIL import features
+        except ImportError:
+                raise SystemExit("--images needs Pillow (pip install Pillow)")
+        formats = [f for f in FORMATS if features.check(f)]
+        if not formats:
+                raise SystemExit(f"Pillow supports none of IMPORT_IMAGE_FORMATS={','.join(FORMATS)}")
+        return formats
+
+
+def load_manifest(path):
+        if not os.path.exists(path):
+                return {}
+        with open(path) as f:
+                return json.load(f)
+
+
+def refresh(conn):
+        """Resolve the images of approved/live products in imp.TABLE and write
+        their variant URLs; returns the number of rows updated."""
+        formats = supported_formats()
+        manifest_path = os.path.join(IMAGE_DIR, "manifest.json")
+        manifest = load_manifest(manifest_path)
+        with conn.cursor() as cur:
+                cur.execute(
+                    f"SELECT id, image_url, image_src, image_srcset, image_avif_srcset "
+                    f"FROM {imp.TABLE} WHERE status IN ('approved', 'live') "
+                    f"AND image_url LIKE 'http%';")
+                rows = cur.fetchall()
+        sources = {}
+        for _, url, *_ in rows:
+                sources.setdefault(source_key(url), url)
+
+        errors = 0
+        with stage("images.fetch"), ThreadPoolExecutor(CONCURRENCY) as pool:
+                futures = {
+                    key: pool.submit(resolve, url, manifest.get(key, {}), formats)
+                    for key, url in sources.items()
+                }
+                for key, future in futures.items():
+                        try:
+                                manifest[key], outcome = future.result()
+                        except Exception as e:
+                                # keep the previous variants, if any, until the source is back
+                                errors += 1
+                                outcome = "failed"
+                                if errors <= MAX_ERRORS_SHOWN:
+                                        print(f"   image {sources[key]}: {type(e).__name__}: {e}")
+                        count(f"images.{outcome}")
+        os.makedirs(IMAGE_DIR, exist_ok=True)
+        imp.save_meta(manifest_path, manifest)
+
+        updates = []
+        for id_, url, *current in rows:
+                entry = manifest.get(source_key(url))
+                if entry and set(entry["variants"]) == set(formats):
+                        cols = image_columns(entry, formats)
+                        if cols != tuple(current):
+                                updates.append((id_, *cols))
+        with stage("db.images"), conn.cursor() as cur:
+                imp.psycopg2.extras.execute_values(
+                    cur,
+                    f"UPDATE {imp.TABLE} p SET image_src = v.src, image_srcset = v.srcset, "
+                    f"image_avif_srcset = v.avif FROM (VALUES %s) v (id, src, srcset, avif) "
+                    f"WHERE p.id = v.id;", updates)
+        count("images.rows_updated", len(updates))
+        print(f"   {len(sources)} distinct images, {errors} failed, "
+              f"{len(updates)} products updated")
+        return len(updates)
@@ -1,12 +1,128 @@
-import os, io, requests, pandas as pd, sys
-import psycopg2
-from psycopg2.extras import execute_values
+import os, math, time, json, hashlib, queue, threading, contextlib, importlib, sys
+from collections import deque, namedtuple
+
+import product_schema
+import age_reference
+
+
+class LazyModule:
+        """Stand-in for a heavy module that is imported on first use.
+
+        The real module then replaces the stand-in in this module's globals,
+        so only the first attribute access pays anything. Keeps --help, the
+        pure helpers and the DDL commands from loading pandas and friends.
+        """
+
+        def __init__(self, name, *submodules):
+                self._name = name
+                self._submodules = submodules
+
+        def __getattr__(self, attr):
+                mod = importlib.import_module(self._name)
+                for sub in self._submodules:
+                        importlib.import_module(f"{self._name}.{sub}")
+                g = globals()
+                for k in [k for k, v in g.items() if v is self]:
+                        g[k] = mod
+                return getattr(mod, attr)
+
+
+pd = LazyModule("pandas")
+np = LazyModule("numpy")
+requests = LazyModule("requests")
+psycopg2 = LazyModule("psycopg2", "extensions", "extras", "pool")
+
+
+def preload():
+        """Import the heavy modules now, e.g. before a worker takes jobs."""
+        for mod in (pd, np, requests, psycopg2):
+                getattr(mod, "__name__")
 
 # Settings
 MULTI_SELECT_AS_ARRAYS = True  # set True only if DB columns are text[] for the 7 multi-select fields
 PROMOTE_ON_IMPORT = True  # set imported rows to "live"
 
-CSV_URL = os.environ["SHEET_CSV_URL"]
+CSV_URL = os.environ.get("SHEET_CSV_URL")
+
+
+def get_arg(name, default=None):
+        """Value following a --flag on the command line, or default."""
+        if name in sys.argv:
+                i = sys.argv.index(name)
+                if i + 1 < len(sys.argv):
+                        return sys.argv[i + 1]
+        return default
+
+
+# Stream the sheet and upsert it chunk by chunk (0 = load it all at once)
+CHUNK_SIZE = int(
+    get_arg("--chunk-size") or os.environ.get("IMPORT_CHUNK_SIZE") or 0)
+
+# Processes normalizing chunks in parallel with the download and the writes
+# (implies streaming; 1 = run every stage in turn)
+WORKERS = int(get_arg("--workers") or os.environ.get("IMPORT_WORKERS") or 1)
+if WORKERS > 1 and not CHUNK_SIZE:
+        CHUNK_SIZE = 10000
+
+# How rows reach the database: "copy" streams them into a staging table and
+# merges with one INSERT ... SELECT, "values" uses execute_values directly
+LOADER = get_arg("--loader") or os.environ.get("IMPORT_LOADER") or "copy"
+
+# Only write rows whose content_hash changed; optionally mark products that
+# are no longer approved in the sheet as "retired"
+RETIRE_MISSING = "--retire-missing" in sys.argv or os.environ.get(
+    "IMPORT_RETIRE_MISSING", "").lower() == "true"
+DELTA = RETIRE_MISSING or "--delta" in sys.argv or os.environ.get(
+    "IMPORT_DELTA", "").lower() == "true"
+
+# Table the rows are written to; ddl_reset.py --swap loads products_next
+# and renames it into place
+TABLE = "products"
+
+# Download product images once and write pre-sized WebP/AVIF variant URLs
+# (image_src, image_srcset, image_avif_srcset), see image_cache.py
+IMAGES = "--images" in sys.argv or os.environ.get(
+    "IMPORT_IMAGES", "").lower() == "true"
+
+# Write the imported catalog as precompressed JSON files the server can send
+# for /api/products without a query, see catalog_snapshot.py
+SNAPSHOT = "--snapshot" in sys.argv or os.environ.get(
+    "IMPORT_SNAPSHOT", "").lower() == "true"
+
+# Normalize and diff against the database without writing anything; the
+# per-row rejections and changes go to a CSV (--dry-run [out.csv]), see dry_run.py
+DRY_RUN = "--dry-run" in sys.argv or os.environ.get(
+    "IMPORT_DRY_RUN", "").lower() == "true"
+DRY_RUN_PATH = None
+if DRY_RUN:
+        DRY_RUN_PATH = get_arg("--dry-run")
+        if not DRY_RUN_PATH or DRY_RUN_PATH.startswith("--"):
+                DRY_RUN_PATH = "dry_run.csv"
+
+# Sheet downloads are cached on disk keyed by URL; an unchanged sheet that
+# was already imported into the target database with the same
+# OUTPUT_OPTIONS is skipped unless --force (ddl_reset.py clears the markers)
+CACHE_DIR = os.environ.get("IMPORT_CACHE_DIR") or os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), ".import_cache")
+FETCH_TIMEOUT = float(os.environ.get("IMPORT_FETCH_TIMEOUT") or 30)
+FETCH_RETRIES = int(os.environ.get("IMPORT_FETCH_RETRIES") or 4)
+FORCE = "--force" in sys.argv
+
+# Write stage timings and counters as JSON (--report out.json) and/or dump
+# cProfile stats of the main process (--profile [out.prof])
+REPORT_PATH = get_arg("--report") or os.environ.get("IMPORT_REPORT")
+PROFILE_PATH = None
+if "--profile" in sys.argv:
+        PROFILE_PATH = get_arg("--profile")
+        if not PROFILE_PATH or PROFILE_PATH.startswith("--"):
+                PROFILE_PATH = "import_profile.prof"
+
+# Run as a long-lived import worker instead of importing once:
+# --serve [port] listens on 127.0.0.1 (IMPORT_DAEMON_PORT, default 8799)
+SERVE = "--serve" in sys.argv
+SERVE_PORT = int(os.environ.get("IMPORT_DAEMON_PORT") or 8799)
+if SERVE and (get_arg("--serve") or "").isdigit():
+        SERVE_PORT = int(get_arg("--serve"))
 
 # Determine which database to use
 USE_PRODUCTION = "--production" in sys.argv or "--prod" in sys.argv or os.environ.get(
@@ -16,41 +132,54 @@ if USE_PRODUCTION:
         # For production database, use PRODUCTION_DATABASE_URL if set, otherwise DATABASE_URL
         DB_URL = os.environ.get("PRODUCTION_DATABASE_URL") or os.environ.get(
             "DATABASE_URL")
-        print("🚀 IMPORTING TO PRODUCTION DATABASE")
 else:
         # For development database
-        DB_URL = os.environ["DATABASE_URL"]
-        print("🔧 IMPORTING TO DEVELOPMENT DATABASE")
-
-# Column order (39 fields)
-COLS = [
-    'id', 'name', 'brand', 'description', 'price', 'image_url', 'categories',
-    'age_range', 'rating', 'review_count', 'affiliate_url', 'is_top_pick',
-    'is_bestseller', 'is_new', 'min_age_months', 'max_age_months',
-    'age_range_category', 'communication_levels', 'motor_levels',
-    'cognitive_levels', 'social_emotional_levels', 'play_type_tags',
-    'complexity_level', 'challenge_rating', 'attention_duration',
-    'stimulation_level', 'structure_preference', 'energy_requirement',
-    'sensory_compatibility', 'social_context', 'cooperation_required',
-    'safety_considerations', 'special_needs_support', 'intervention_focus',
-    'noise_level', 'mess_factor', 'setup_time', 'space_requirements',
-    'is_liza_toph_certified', 'status'
-]
+        DB_URL = os.environ.get("DATABASE_URL")
 
-# Multi-select fields
-ARRAY_FIELDS = {
-    "categories", "play_type_tags", "sensory_compatibility", "social_context",
-    "safety_considerations", "special_needs_support", "intervention_focus"
+# Import into several databases from one fetch: --targets dev,prod fetches and
+# normalizes once, then writes to every target concurrently, each in its own
+# transaction; --all-or-nothing holds every commit until all targets are ready
+TARGET_URLS = {
+    "development": "DATABASE_URL",
+    "production": "PRODUCTION_DATABASE_URL",
 }
+TARGET_ALIASES = {"dev": "development", "prod": "production"}
+TARGETS = [
+    TARGET_ALIASES.get(t.strip(), t.strip())
+    for t in (get_arg("--targets") or os.environ.get("IMPORT_TARGETS") or "").split(",")
+    if t.strip()
+]
+ALL_OR_NOTHING = "--all-or-nothing" in sys.argv or os.environ.get(
+    "IMPORT_ALL_OR_NOTHING", "").lower() == "true"
+
+
+def target_url(target):
+        """Database URL of a named target, or None if it is not configured."""
+        return os.environ.get(TARGET_URLS.get(target, ""))
+
+
+def check_settings():
+        if LOADER not in ("copy", "values"):
+                raise SystemExit(f"Unknown loader: {LOADER} (use copy or values)")
+        if not CSV_URL:
+                raise SystemExit("SHEET_CSV_URL is not set")
+        if TARGETS:
+                for t in TARGETS:
+                        if t not in TARGET_URLS:
+                                raise SystemExit(f"Unknown target: {t} (use {', '.join(TARGET_URLS)})")
+                        if not target_url(t):
+                                raise SystemExit(f"{TARGET_URLS[t]} is not set (target {t})")
+                if CHUNK_SIZE:
+                        raise SystemExit("--targets normalizes the sheet in memory; drop --chunk-size/--workers")
+        elif not DB_URL:
+                raise SystemExit("DATABASE_URL is not set")
+
+# Column order (40 fields) and multi-select fields, see product_schema.py
+COLS = list(product_schema.SHEET_COLUMNS)
+ARRAY_FIELDS = set(product_schema.ARRAY_FIELDS)
 
 # Allowed enums
 AL_DEV = {"emerging", "developing", "proficient", "advanced"}
-AL_AGE_CAT = {
-    "Newborn to 18 months", "18 months to 3 years", "2 to 5 years",
-    "3 to 6 years", "4 to 7 years", "5 to 8 years", "6 to 9 years",
-    "7 to 10 years", "8 to 11 years", "9 to 12 years", "10 to Early Teens",
-    "Preteens to Older Teens"
-}
 AL_PLAY = {
     "pretend_play", "building_toys", "art_supplies", "active_play", "puzzles",
     "musical_toys", "sensory_toys", "group_games", "imagination",
@@ -77,13 +206,79 @@ AL_MESS = {"minimal", "moderate", "messy"}
 AL_SETUP = {"immediate", "quick", "moderate", "extended"}
 AL_SPACE = {"small", "medium", "large", "outdoor"}
 
+# Text fields normalized with norm_text
+TEXT_COLS = [
+    "id", "name", "brand", "description", "image_url", "age_range",
+    "affiliate_url", "age_range_category", "communication_levels",
+    "motor_levels", "cognitive_levels", "social_emotional_levels",
+    "complexity_level", "attention_duration", "stimulation_level",
+    "structure_preference", "energy_requirement", "noise_level", "mess_factor",
+    "setup_time", "space_requirements", "status", "categories",
+    "play_type_tags", "sensory_compatibility", "social_context",
+    "safety_considerations", "special_needs_support", "intervention_focus"
+]
+
+# Single-select column -> allowlist (invalid values are blanked)
+ENUM_ALLOWLISTS = {
+    "communication_levels": AL_DEV,
+    "motor_levels": AL_DEV,
+    "cognitive_levels": AL_DEV,
+    "social_emotional_levels": AL_DEV,
+    "complexity_level": AL_COMPLEX,
+    "attention_duration": AL_ATTN,
+    "stimulation_level": AL_STIM,
+    "structure_preference": AL_STRUCT,
+    "energy_requirement": AL_ENERGY,
+    "noise_level": AL_NOISE,
+    "mess_factor": AL_MESS,
+    "setup_time": AL_SETUP,
+    "space_requirements": AL_SPACE,
+}
+
+# Multi-select column -> allowlist (None keeps every tag, only deduped)
+MULTI_ALLOWLISTS = {
+    "categories": None,
+    "play_type_tags": AL_PLAY,
+    "sensory_compatibility": None,
+    "social_context": None,
+    "safety_considerations": AL_SAFE,
+    "special_needs_support": AL_NEEDS,
+    "intervention_focus": AL_INT,
+}
+
+# age_range_category labels (allowed, in band order) and by_month[m], the
+# label for m months of max_age_months (0..max_month, clamped), since every
+# band bound is a whole month. Compiled by age_reference.py into
+# src/data/ageReference.json
+AgeTables = namedtuple("AgeTables", "labels allowed by_month max_month")
+_age_tables = None
+
+
+def age_tables():
+        """The AgeTables, read on first use so importing this module (--help,
+        the DDL commands) does not touch the file."""
+        global _age_tables
+        if _age_tables is None:
+                ref = age_reference.load()
+                labels = tuple(b["label"] for b in ref["bands"])
+                by_month = tuple(labels[b - 1] for b in ref["byMonth"])
+                _age_tables = AgeTables(labels, frozenset(labels), by_month,
+                                        len(by_month) - 1)
+        return _age_tables
+
+NORM_TEXT_TABLE = str.maketrans({
+    "\u2019": "'",
+    "\u2018": "'",
+    "\u201c": '"',
+    "\u201d": '"',
+    "\u2013": "-",
+    "\u2014": "-",
+})
+
 
 def norm_text(s):
         if s is None: return None
-        return (str(s).replace("\u2019", "'").replace("\u2018", "'").replace(
-            "\u201c", '"').replace("\u201d",
-                                   '"').replace("\u2013",
-                                                "-").replace("\u2014", "-"))
+        return str(s).translate(NORM_TEXT_TABLE)
 
 
 def to_bool(v):
@@ -132,22 +327,33 @@ def check_enum(value, allowed):
         return v if v in allowed else ""
 
 
+def to_int_or_none(x):
+        if pd.isna(x): return None
+        sx = str(x).strip()
+        if sx == "": return None
+        try:
+                return int(float(sx))
+        except:
+                return None
+
+
 def calc_age_category(min_m, max_m):
         if min_m is None or max_m is None:
                 return ""
-        end_y = max_m / 12.0
-        if end_y <= 1.5: return "Newborn to 18 months"
-        if end_y <= 3: return "18 months to 3 years"
-        if end_y <= 5: return "2 to 5 years"
-        if end_y <= 6: return "3 to 6 years"
-        if end_y <= 7: return "4 to 7 years"
-        if end_y <= 8: return "5 to 8 years"
-        if end_y <= 9: return "6 to 9 years"
-        if end_y <= 10: return "7 to 10 years"
-        if end_y <= 11: return "8 to 11 years"
-        if end_y <= 12: return "9 to 12 years"
-        if end_y <= 13: return "10 to Early Teens"
-        return "Preteens to Older Teens"
+        # a fraction of a month belongs to the band of the next whole month
+        ages = age_tables()
+        return ages.by_month[min(max(math.ceil(max_m), 0), ages.max_month)]
+
+
+def calc_age_categories(min_m, max_m):
+        """Vectorized calc_age_category over two float arrays (NaN = missing)."""
+        min_m = np.asarray(min_m, dtype="float64")
+        max_m = np.asarray(max_m, dtype="float64")
+        missing = np.isnan(min_m) | np.isnan(max_m)
+        ages = age_tables()
+        idx = np.clip(np.ceil(np.where(missing, 0, max_m)), 0, ages.max_month)
+        labels = np.asarray(ages.by_month, dtype=object)[idx.astype(np.intp)]
+        return np.where(missing, "", labels)
 
 
 def convert_google_drive_url(url):
@@ -195,106 +401,325 @@ def convert_google_drive_url(url):
         return url_str
 
 
-def load_csv(url):
-        r = requests.get(url, timeout=30, allow_redirects=True)
-        r.raise_for_status()
-        df = pd.read_csv(io.StringIO(r.text))
+def by_category(col, fn):
+        """Run a column transform over the distinct values of col only.
 
+        Sheet columns are highly repetitive, so fn sees the categories of the
+        column and the result is broadcast back through the category codes.
+        """
+        codes, uniques = pd.factorize(col, use_na_sentinel=False)
+        mapped = np.empty(len(uniques), dtype=object)
+        mapped[:] = list(fn(pd.Series(uniques, dtype=object)))
+        return pd.Series(mapped[codes], index=col.index, dtype=object)
+
+
+def map_unique(col, fn):
+        """Apply a scalar function once per distinct value of a column."""
+        return by_category(col, lambda u: [fn(x) for x in u])
+
+
+def norm_text_values(values):
+        """Vectorized norm_text; missing cells become ""."""
+        present = values.notna().to_numpy()
+        out = np.full(len(values), "", dtype=object)
+        strs = values[present].astype(str).tolist()
+        if not strs:
+                return out
+        # one translate pass over the whole column, unless a cell already
+        # contains the separator used to stitch it together
+        joined = "\x1f".join(strs)
+        if joined.count("\x1f") == len(strs) - 1:
+                out[present] = joined.translate(NORM_TEXT_TABLE).split("\x1f")
+        else:
+                out[present] = [x.translate(NORM_TEXT_TABLE) for x in strs]
+        return out
+
+
+def norm_multi_values(values, allowed=None):
+        """Vectorized norm_multi, plus filter_multi when an allowlist is given."""
+        values = values.reset_index(drop=True)
+        tags = values.astype(str).str.split(",").explode().str.strip()
+        keep = tags.notna() & (tags != "")
+        if allowed is not None:
+                keep &= tags.isin(allowed)
+        tags = tags[keep].to_frame("tag").reset_index().drop_duplicates()
+        out = np.full(len(values), "", dtype=object)
+        if tags.empty:
+                return out
+        # explode keeps rows in order, so each row's tags are contiguous
+        rows = tags["index"].to_numpy()
+        starts = np.flatnonzero(np.r_[True, rows[1:] != rows[:-1]])
+        groups = np.split(tags["tag"].to_numpy(dtype=object), starts[1:])
+        out[rows[starts]] = [", ".join(g) for g in groups]
+        return out
+
+
+def check_enum_values(values, allowed):
+        """Vectorized check_enum."""
+        v = values.astype(str).str.strip()
+        return v.where(v.isin(allowed), "").astype(object)
+
+
+# Stage timings ("seconds" and "calls" per dotted stage name) and counters
+# collected over one import. Worker processes collect their own and the
+# caller merges them in, so summed stage seconds can exceed wall time.
+def new_metrics():
+        return {"stages": {}, "counters": {}, "targets": {}}
+
+
+METRICS = new_metrics()
+
+
+def add_time(name, seconds, calls=1):
+        s = METRICS["stages"].setdefault(name, {"seconds": 0.0, "calls": 0})
+        s["seconds"] += seconds
+        s["calls"] += calls
+
+
+@contextlib.contextmanager
+def stage(name):
+        """Add the wall time of the with-block to stage name."""
+        t0 = time.perf_counter()
+        try:
+                yield
+        finally:
+                add_time(name, time.perf_counter() - t0)
+
+
+def count(name, n=1):
+        c = METRICS["counters"]
+        c[name] = c.get(name, 0) + int(n)
+
+
+def merge_metrics(m):
+        for name, s in m["stages"].items():
+                add_time(name, s["seconds"], s["calls"])
+        for name, n in m["counters"].items():
+                count(name, n)
+
+
+def build_report(outcome, seconds):
+        return {
+            "outcome": outcome,
+            "target": ",".join(TARGETS) or ("production" if USE_PRODUCTION else "development"),
+            "finished_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "seconds": round(seconds, 3),
+            "options": {
+                "chunk_size": CHUNK_SIZE,
+                "workers": WORKERS,
+                "loader": LOADER,
+                "delta": DELTA,
+                "retire_missing": RETIRE_MISSING,
+                "force": FORCE,
+                "all_or_nothing": ALL_OR_NOTHING,
+                "dry_run": DRY_RUN
+            },
+            "counters": METRICS["counters"],
+            "targets": METRICS["targets"],
+            "stages": {
+                name: {
+                    "seconds": round(s["seconds"], 4),
+                    "calls": s["calls"]
+                }
+                for name, s in METRICS["stages"].items()
+            }
+        }
+
+
+def write_report(path, outcome, seconds):
+        report = build_report(outcome, seconds)
+        tmp = path + ".part"
+        with open(tmp, "w") as f:
+                json.dump(report, f, indent=2)
+        os.replace(tmp, path)
+
+
+def cache_paths(url):
+        key = hashlib.sha256(url.encode()).hexdigest()[:24]
+        base = os.path.join(CACHE_DIR, key)
+        return base + ".csv", base + ".json"
+
+
+_session = None
+
+
+def http():
+        """requests session reused across fetches, so a warm worker keeps its
+        TLS connection to the sheet host."""
+        global _session
+        if _session is None:
+                _session = requests.Session()
+        return _session
+
+
+def get_with_retry(url, headers):
+        """GET with exponential backoff on connection errors, 429 and 5xx."""
+        for attempt in range(FETCH_RETRIES + 1):
+                try:
+                        r = http().get(url,
+                                     headers=headers,
+                                     timeout=FETCH_TIMEOUT,
+                                     allow_redirects=True,
+                                     stream=True)
+                        if r.status_code != 429 and r.status_code < 500:
+                                r.raise_for_status()
+                                return r
+                        err = requests.HTTPError(
+                            f"{r.status_code} {r.reason} for url: {url}",
+                            response=r)
+                        r.close()
+                except (requests.ConnectionError, requests.Timeout) as e:
+                        err = e
+                if attempt == FETCH_RETRIES:
+                        raise err
+                delay = 2**attempt
+                count("fetch.retries")
+                print(f"⚠️  Fetch failed ({err}), retrying in {delay}s...")
+                time.sleep(delay)
+
+
+def fetch_sheet(url):
+        """Download the sheet into the local cache, revalidating if cached.
+
+        Returns {"path", "meta_path", "meta"}; meta holds the ETag,
+        Last-Modified and sha256 of the cached body plus the import_key last
+        imported into each target database.
+        """
+        body_path, meta_path = cache_paths(url)
+        meta = {}
+        if os.path.exists(meta_path) and os.path.exists(body_path):
+                with open(meta_path) as f:
+                        meta = json.load(f)
+        headers = {}
+        if meta.get("etag"):
+                headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+                headers["If-Modified-Since"] = meta["last_modified"]
+
+        with stage("fetch.request"):
+                r = get_with_retry(url, headers)
+        with r:
+                if r.status_code == 304:
+                        count("fetch.not_modified")
+                        print("Sheet not modified since last fetch (304)")
+                else:
+                        os.makedirs(CACHE_DIR, exist_ok=True)
+                        digest = hashlib.sha256()
+                        tmp = body_path + ".part"
+                        with stage("fetch.download"), open(tmp, "wb") as f:
+                                for block in r.iter_content(1 << 16):
+                                        digest.update(block)
+                                        f.write(block)
+                                        count("fetch.bytes", len(block))
+                        os.replace(tmp, body_path)
+                        meta.update(url=url,
+                                    etag=r.headers.get("ETag"),
+                                    last_modified=r.headers.get("Last-Modified"),
+                                    sha256=digest.hexdigest())
+                        save_meta(meta_path, meta)
+        return {"path": body_path, "meta_path": meta_path, "meta": meta}
+
+
+def save_meta(meta_path, meta):
+        tmp = meta_path + ".part"
+        with open(tmp, "w") as f:
+                json.dump(meta, f, indent=2)
+        os.replace(tmp, meta_path)
+
+
+def target_key(dsn=None):
+        """Identifies the target database without writing its DSN to disk."""
+        return hashlib.sha256((dsn or DB_URL or "").encode()).hexdigest()[:16]
+
+
+# Options that change what an import writes: an unchanged sheet is only
+# skipped if the last import into the target ran with the same ones
+OUTPUT_OPTIONS = ("images", "snapshot", "retire_missing")
+
+
+def import_key(meta):
+        """The sheet hash plus the OUTPUT_OPTIONS in effect."""
+        on = {"images": IMAGES, "snapshot": SNAPSHOT,
+              "retire_missing": RETIRE_MISSING}
+        return "+".join([meta.get("sha256") or "",
+                         *(o for o in OUTPUT_OPTIONS if on[o])])
+
+
+def already_imported(sheet, dsn=None):
+        meta = sheet["meta"]
+        return meta.get("imported", {}).get(target_key(dsn)) == import_key(meta)
+
+
+def mark_imported(sheet, dsn=None):
+        meta = sheet["meta"]
+        meta.setdefault("imported", {})[target_key(dsn)] = import_key(meta)
+        save_meta(sheet["meta_path"], meta)
+
+
+def forget_imported(dsn=None):
+        """Clear the target's imported marker on every cached sheet, for when
+        its products table was recreated or swapped: the next import of an
+        unchanged sheet then runs instead of being skipped."""
+        key = target_key(dsn)
+        if not os.path.isdir(CACHE_DIR):
+                return
+        for name in os.listdir(CACHE_DIR):
+                if not name.endswith(".json"):
+                        continue
+                meta_path = os.path.join(CACHE_DIR, name)
+                with open(meta_path) as f:
+                        meta = json.load(f)
+                if meta.get("imported", {}).pop(key, None) is not None:
+                        save_meta(meta_path, meta)
+
+
+def read_sheet(url):
+        return pd.read_csv(fetch_sheet(url)["path"])
+
+
+def normalize(df):
         # keep rows with status approved or live
-        s = df["status"].astype(str).str.lower().str.strip()
-        df = df[s.isin({"approved", "live"})].copy()
+        with stage("normalize.status"):
+                s = df["status"].astype(str).str.lower().str.strip()
+                keep = s.isin({"approved", "live"})
+                count("rows.read", len(df))
+                if not keep.all():
+                        dropped = s[~keep].fillna("").replace("nan", "")
+                        dropped = dropped.replace("", "(blank)")
+                        for status, n in dropped.value_counts().items():
+                                count(f"rows.dropped.status:{status}", n)
+                df = df[keep].copy()
+                count("rows.approved", len(df))
 
         # normalize text fields
-        text_cols = [
-            "id", "name", "brand", "description", "image_url", "age_range",
-            "affiliate_url", "age_range_category", "communication_levels",
-            "motor_levels", "cognitive_levels", "social_emotional_levels",
-            "complexity_level", "attention_duration", "stimulation_level",
-            "structure_preference", "energy_requirement", "noise_level",
-            "mess_factor", "setup_time", "space_requirements", "status",
-            "categories", "play_type_tags", "sensory_compatibility",
-            "social_context", "safety_considerations", "special_needs_support",
-            "intervention_focus"
-        ]
-        for c in text_cols:
+        for c in TEXT_COLS:
                 if c in df.columns:
-                        df[c] = df[c].apply(lambda x: ""
-                                            if pd.isna(x) else norm_text(x))
+                        with stage(f"normalize.text.{c}"):
+                                df[c] = by_category(df[c], norm_text_values)
 
         # Convert Google Drive URLs to direct image URLs
         if "image_url" in df.columns:
-                df["image_url"] = df["image_url"].apply(convert_google_drive_url)
-
-        # clean multi selects then enforce allowlists
-        for c in [
-            "categories", "play_type_tags", "sensory_compatibility",
-            "social_context", "safety_considerations", "special_needs_support",
-            "intervention_focus"
-        ]:
+                with stage("normalize.image_url"):
+                        df["image_url"] = map_unique(df["image_url"],
+                                                     convert_google_drive_url)
+
+        # clean multi selects and enforce allowlists in one pass
+        for c, allowed in MULTI_ALLOWLISTS.items():
                 if c in df.columns:
-                        df[c] = df[c].apply(norm_multi)
-
-        df["communication_levels"] = df["communication_levels"].apply(
-            lambda v: check_enum(v, AL_DEV))
-        df["motor_levels"] = df["motor_levels"].apply(
-            lambda v: check_enum(v, AL_DEV))
-        df["cognitive_levels"] = df["cognitive_levels"].apply(
-            lambda v: check_enum(v, AL_DEV))
-        df["social_emotional_levels"] = df["social_emotional_levels"].apply(
-            lambda v: check_enum(v, AL_DEV))
-        df["complexity_level"] = df["complexity_level"].apply(
-            lambda v: check_enum(v, AL_COMPLEX))
-        df["attention_duration"] = df["attention_duration"].apply(
-            lambda v: check_enum(v, AL_ATTN))
-        df["stimulation_level"] = df["stimulation_level"].apply(
-            lambda v: check_enum(v, AL_STIM))
-        df["structure_preference"] = df["structure_preference"].apply(
-            lambda v: check_enum(v, AL_STRUCT))
-        df["energy_requirement"] = df["energy_requirement"].apply(
-            lambda v: check_enum(v, AL_ENERGY))
-        df["noise_level"] = df["noise_level"].apply(
-            lambda v: check_enum(v, AL_NOISE))
-        df["mess_factor"] = df["mess_factor"].apply(
-            lambda v: check_enum(v, AL_MESS))
-        df["setup_time"] = df["setup_time"].apply(
-            lambda v: check_enum(v, AL_SETUP))
-        df["space_requirements"] = df["space_requirements"].apply(
-            lambda v: check_enum(v, AL_SPACE))
-
-        df["play_type_tags"] = df["play_type_tags"].apply(
-            lambda v: filter_multi(v, AL_PLAY))
-        df["safety_considerations"] = df["safety_considerations"].apply(
-            lambda v: filter_multi(v, AL_SAFE))
-        df["special_needs_support"] = df["special_needs_support"].apply(
-            lambda v: filter_multi(v, AL_NEEDS))
-        df["intervention_focus"] = df["intervention_focus"].apply(
-            lambda v: filter_multi(v, AL_INT))
+                        with stage(f"normalize.multi.{c}"):
+                                df[c] = by_category(
+                                    df[c],
+                                    lambda v: norm_multi_values(v, allowed))
 
-        # age sanity and auto age_range_category if missing
-        def fix_row(row):
-
-                def to_int_or_none(x):
-                        if pd.isna(x): return None
-                        sx = str(x).strip()
-                        if sx == "": return None
-                        try:
-                                return int(float(sx))
-                        except:
-                                return None
-
-                minm = to_int_or_none(row.get("min_age_months"))
-                maxm = to_int_or_none(row.get("max_age_months"))
-                if minm is not None and maxm is not None and maxm < minm:
-                        maxm = minm
-                row["min_age_months"] = minm
-                row["max_age_months"] = maxm
-                if not row.get("age_range_category") or row[
-                    "age_range_category"] not in AL_AGE_CAT:
-                        row["age_range_category"] = calc_age_category(
-                            minm, maxm)
-                return row
-
-        df = df.apply(fix_row, axis=1)
+        for c, allowed in ENUM_ALLOWLISTS.items():
+                if c in df.columns:
+                        with stage(f"normalize.enum.{c}"):
+                                df[c] = by_category(
+                                    df[c],
+                                    lambda v: check_enum_values(v, allowed))
+
+        with stage("normalize.age"):
+                df = normalize_ages(df)
 
         if PROMOTE_ON_IMPORT:
                 df.loc[:, "status"] = "live"
@@ -309,6 +734,131 @@ def load_csv(url):
         return df
 
 
+def normalize_ages(df):
+        # age sanity and auto age_range_category if missing
+        blank = pd.Series(None, index=df.index, dtype=object)
+        minm = map_unique(df.get("min_age_months", blank), to_int_or_none)
+        maxm = map_unique(df.get("max_age_months", blank), to_int_or_none)
+        min_f = minm.astype("float64").to_numpy()
+        max_f = maxm.astype("float64").to_numpy(copy=True)
+        swapped = max_f < min_f  # False whenever either side is NaN
+        maxm[swapped] = minm[swapped]
+        max_f[swapped] = min_f[swapped]
+        df["min_age_months"] = minm
+        df["max_age_months"] = maxm
+        if "age_range_category" in df.columns:
+                keep = df["age_range_category"].isin(
+                    age_tables().allowed).to_numpy()
+        else:
+                keep = np.zeros(len(df), dtype=bool)
+        if not keep.all():
+                computed = calc_age_categories(min_f, max_f)
+                current = df.get("age_range_category", blank)
+                df["age_range_category"] = np.where(
+                    keep, current.to_numpy(dtype=object), computed)
+        return df
+
+
+def load_csv(url):
+        return normalize(read_sheet(url))
+
+
+def iter_sheet(path, chunk_size):
+        """Yield a downloaded sheet as raw DataFrame chunks."""
+        with pd.read_csv(path, chunksize=chunk_size) as reader:
+                while True:
+                        with stage("parse"):
+                                chunk = next(reader, None)
+                        if chunk is None:
+                                return
+                        yield chunk
+
+
+def prepare_chunk(chunk):
+        """Normalize a raw chunk and encode it; runs in a worker process.
+
+        Returns (rows read, row tuples, metrics collected while preparing).
+        """
+        global METRICS
+        outer, METRICS = METRICS, new_metrics()
+        try:
+                df = normalize(chunk)
+                with stage("encode"):
+                        rows = list(encode_rows(df))
+                return len(chunk), rows, METRICS
+        finally:
+                METRICS = outer
+
+
+def put_until(q, item, stop):
+        """q.put that gives up once stop is set, so producers never hang."""
+        while not stop.is_set():
+                try:
+                        q.put(item, timeout=0.1)
+                        return
+                except queue.Full:
+                        pass
+
+
+def produce_chunks(path, chunk_size, q, stop):
+        """Parse chunks into q; stops parsing as soon as stop is set, e.g.
+        when a write failed and the import is being torn down."""
+        try:
+                for chunk in iter_sheet(path, chunk_size):
+                        put_until(q, chunk, stop)
+                        if stop.is_set():
+                                return
+                put_until(q, None, stop)
+        except BaseException as e:
+                put_until(q, e, stop)
+
+
+def prepared_chunks(path, chunk_size, workers):
+        """Yield (rows read, encoded rows, metrics) per chunk, in sheet order.
+
+        With workers > 1 a producer thread parses chunks into a bounded queue
+        while a process pool normalizes them, so parsing, normalization and
+        the caller's database writes all overlap. At most 2 * workers chunks
+        are in flight, which keeps memory bounded when the writer is slower.
+        """
+        if workers <= 1:
+                for chunk in iter_sheet(path, chunk_size):
+                        yield prepare_chunk(chunk)
+                return
+
+        from concurrent.futures import ProcessPoolExecutor
+
+        raw = queue.Queue(maxsize=workers)
+        stop = threading.Event()
+        producer = threading.Thread(target=produce_chunks,
+                                    args=(path, chunk_size, raw, stop),
+                                    daemon=True)
+        pool = ProcessPoolExecutor(workers)
+        pending = deque()
+        done = False
+        producer.start()
+        try:
+                while not done or pending:
+                        while not done and len(pending) < 2 * workers:
+                                try:
+                                        item = raw.get(block=not pending)
+                                except queue.Empty:
+                                        break
+                                if item is None:
+                                        done = True
+                                elif isinstance(item, BaseException):
+                                        raise item
+                                else:
+                                        pending.append(
+                                            pool.submit(prepare_chunk, item))
+                        if pending:
+                                yield pending.popleft().result()
+        finally:
+                stop.set()
+                pool.shutdown(wait=True, cancel_futures=True)
+                producer.join()
+
+
 def row_to_tuple(row):
         out = []
         for c in COLS:
@@ -340,50 +890,419 @@ def row_to_tuple(row):
         return tuple(out)
 
 
+def text_value(v):
+        if type(v) is str:  # the common case, skip pd.isna
+                return v.translate(NORM_TEXT_TABLE) if v else None
+        return None if (pd.isna(v) or str(v) == "") else norm_text(v)
+
+
+def array_value(v):
+        if pd.isna(v) or str(v).strip() == "":
+                return []
+        return [p.strip() for p in str(v).split(",") if p.strip()]
+
+
+def multi_text_value(v):
+        return "" if pd.isna(v) else str(v)
+
+
+# How each column is encoded, from its type in product_schema
+PG_TYPE_ENCODING = {
+    "numeric": "num",
+    "integer": "int",
+    "boolean": "bool",
+    "text[]": "array",
+}
+COL_TYPES = {
+    c: PG_TYPE_ENCODING.get(t, "text")
+    for c, t in product_schema.SHEET_COLUMNS.items()
+}
+
+VALUE_ENCODERS = {
+    "num": to_num,
+    "int": lambda v: to_num(v, is_int=True),
+    "bool": to_bool,
+    "array": array_value if MULTI_SELECT_AS_ARRAYS else multi_text_value,
+    "text": text_value,
+}
+
+# (column, scalar encoder) in COLS order, resolved once
+COLUMN_ENCODERS = [(c, VALUE_ENCODERS[COL_TYPES[c]]) for c in COLS]
+
+
+def encode_rows(df):
+        """Row tuples identical to row_to_tuple, built column by column.
+
+        Each encoder runs once per distinct value of its column and the
+        tuples are zipped from plain lists, so no per-row Series is created.
+        """
+        return zip(*(map_unique(df[c], fn).tolist()
+                     for c, fn in COLUMN_ENCODERS))
+
+
+def upsert_sql(cols=COLS):
+        col_list = ", ".join(f'"{c}"' for c in cols)
+        set_clause = ", ".join(f'"{c}" = EXCLUDED."{c}"' for c in cols
+                               if c != "id")
+        return f'INSERT INTO {TABLE} ({col_list}) VALUES %s ON CONFLICT ("id") DO UPDATE SET {set_clause};'
+
+
+COPY_ESCAPES = str.maketrans({
+    "\\": "\\\\",
+    "\t": "\\t",
+    "\n": "\\n",
+    "\r": "\\r",
+})
+
+
+def copy_array(items):
+        if not items: return "{}"
+        if any('"' in t or "\\" in t for t in items):
+                items = [t.replace("\\", "\\\\").replace('"', '\\"') for t in items]
+        return '{"' + '","'.join(items) + '"}'
+
+
+def copy_value(v):
+        """Render one row_to_tuple value in COPY text format."""
+        if v is None: return "\\N"
+        if v is True: return "t"
+        if v is False: return "f"
+        if v.__class__ is list: v = copy_array(v)
+        s = str(v)
+        if "\\" in s or "\t" in s or "\n" in s or "\r" in s:
+                s = s.translate(COPY_ESCAPES)
+        return s
+
+
+class CopyStream:
+        """File-like object feeding row tuples to copy_expert lazily."""
+
+        def __init__(self, rows):
+                self.rows = iter(rows)
+                self.buf = ""
+
+        def read(self, size=-1):
+                while size < 0 or len(self.buf) < size:
+                        row = next(self.rows, None)
+                        if row is None:
+                                break
+                        self.buf += "\t".join(map(copy_value, row)) + "\n"
+                if size < 0:
+                        size = len(self.buf)
+                out, self.buf = self.buf[:size], self.buf[size:]
+                return out
+
+
+def copy_merge(cur, rows, cols=COLS):
+        """Bulk load rows via COPY into a temp table, then merge into products.
+
+        Runs inside the caller's transaction; the staging table is dropped on
+        commit. If an id appears twice, the later row wins, as it would with
+        execute_values.
+        """
+        col_list = ", ".join(f'"{c}"' for c in cols)
+        set_clause = ", ".join(f'"{c}" = EXCLUDED."{c}"' for c in cols
+                               if c != "id")
+        cur.execute(
+            f"CREATE TEMP TABLE products_stage (LIKE {TABLE}) ON COMMIT DROP;")
+        cur.execute("ALTER TABLE products_stage ADD COLUMN _ord bigserial;")
+        if MULTI_SELECT_AS_ARRAYS:
+                retype = ", ".join(
+                    f'ALTER COLUMN "{c}" TYPE text[] USING NULL'
+                    for c in cols if c in ARRAY_FIELDS)
+                cur.execute(f"ALTER TABLE products_stage {retype};")
+        cur.copy_expert(f"COPY products_stage ({col_list}) FROM STDIN",
+                        CopyStream(rows))
+        cur.execute(
+            f'INSERT INTO {TABLE} ({col_list}) '
+            f'SELECT DISTINCT ON ("id") {col_list} FROM products_stage '
+            f'ORDER BY "id", _ord DESC '
+            f'ON CONFLICT ("id") DO UPDATE SET {set_clause};')
+
+
+def write_rows(cur, rows, cols=COLS):
+        if LOADER == "copy":
+                copy_merge(cur, rows, cols)
+        else:
+                psycopg2.extras.execute_values(cur, upsert_sql(cols), rows)
+
+
+# Every import writes content_hash with the row, so a later --delta run
+# compares against what is actually stored
+HASHED_COLS = COLS + ["content_hash"]
+
+
+def row_hash(t):
+        """Stable digest of a row_to_tuple result."""
+        return hashlib.blake2b(repr(t).encode(), digest_size=16).hexdigest()
+
+
+def load_hashes(cur):
+        with stage("db.load_hashes"):
+                cur.execute(f"SELECT id, content_hash FROM {TABLE};")
+                return dict(cur.fetchall())
+
+
+def delta_rows(rows, known, stats):
+        """Row tuples that are new or changed, with their content_hash appended.
+
+        known maps id -> stored hash and is updated as rows are classified;
+        stats tallies inserted/updated/unchanged and collects seen ids.
+        """
+        out = []
+        for t in rows:
+                h = row_hash(t)
+                stats["seen"].add(t[0])
+                if t[0] not in known:
+                        stats["inserted"] += 1
+                elif known[t[0]] != h:
+                        stats["updated"] += 1
+                else:
+                        stats["unchanged"] += 1
+                        continue
+                known[t[0]] = h
+                out.append(t + (h, ))
+        return out
+
+
+def hashed_rows(rows, ids):
+        """rows with their content_hash appended; collects the ids sent."""
+        for t in rows:
+                ids.append(t[0])
+                yield t + (row_hash(t), )
+
+
+def write_batch(cur, rows, known, stats):
+        """Upsert row tuples; returns the ids that were sent."""
+        with stage("db.write"):
+                if not DELTA:
+                        ids = []
+                        write_rows(cur, hashed_rows(rows, ids), HASHED_COLS)
+                        count("rows.upserted", len(ids))
+                        return ids
+                rows = delta_rows(rows, known, stats)
+                if rows:
+                        write_rows(cur, rows, HASHED_COLS)
+                count("rows.upserted", len(rows))
+                return [r[0] for r in rows]
+
+
+def retire_missing(cur, known, stats):
+        """Mark products that were not in this import as retired.
+
+        content_hash is cleared so the row is rewritten if it comes back.
+        """
+        gone = [i for i in known if i not in stats["seen"]]
+        cur.execute(
+            f"UPDATE {TABLE} SET status = 'retired', content_hash = NULL "
+            "WHERE id = ANY(%s) AND status IS DISTINCT FROM 'retired' "
+            "RETURNING id;", (gone, ))
+        retired = [r[0] for r in cur.fetchall()]
+        stats["retired"] = len(retired)
+        return retired
+
+
+def new_stats():
+        return {
+            "inserted": 0,
+            "updated": 0,
+            "unchanged": 0,
+            "retired": 0,
+            "seen": set()
+        }
+
+
+def print_delta(stats):
+        for k in ("inserted", "updated", "unchanged", "retired"):
+                count(f"delta.{k}", stats[k])
+        print(
+            f"   inserted {stats['inserted']}, updated {stats['updated']}, unchanged {stats['unchanged']}, retired {stats['retired']}"
+        )
+
+
+def print_db_error(e):
+        print(f"❌ Error connecting to database: {e}")
+        if USE_PRODUCTION:
+                print("\nℹ️  To import to production, you need to:")
+                print(
+                    "   1. Get production database credentials from your Replit App"
+                )
+                print(
+                    "   2. Set PRODUCTION_DATABASE_URL secret with the production connection string"
+                )
+                print(
+                    "   3. Run: python import_from_sheet.py --production"
+                )
+
+
+def upsert_rows(rows, dsn=None, before_commit=None):
+        """Write encoded rows to one database in a single transaction.
+
+        before_commit, if given, runs right before the commit and may raise
+        to roll the transaction back. Returns (ids sent, delta stats).
+        """
+        stats = new_stats()
+        with db_conn(dsn) as conn:
+                with conn.cursor() as cur:
+                        known = load_hashes(cur) if DELTA else {}
+                        ids = write_batch(cur, rows, known, stats)
+                        if RETIRE_MISSING:
+                                with stage("db.retire"):
+                                        retire_missing(cur, known, stats)
+                if before_commit:
+                        before_commit()
+                with stage("db.commit"):
+                        conn.commit()
+        return ids, stats
+
+
 def upsert(df):
         if df.empty:
                 print("No approved rows to import.")
                 return
-        rows = [row_to_tuple(r) for _, r in df.iterrows()]
-        col_list = ", ".join(f'"{c}"' for c in COLS)
-        set_clause = ", ".join(f'"{c}" = EXCLUDED."{c}"' for c in COLS
-                               if c != "id")
-        sql = f'INSERT INTO products ({col_list}) VALUES %s ON CONFLICT ("id") DO UPDATE SET {set_clause};'
 
         print(f"Connecting to database...")
         try:
-                with psycopg2.connect(DB_URL) as conn:
-                        with conn.cursor() as cur:
-                                execute_values(cur, sql, rows)
-                        conn.commit()
+                with stage("encode"):
+                        rows = list(encode_rows(df))
+                ids, stats = upsert_rows(rows)
                 print(
-                    f"✅ Successfully upserted {len(rows)} rows to {'PRODUCTION' if USE_PRODUCTION else 'DEVELOPMENT'} database."
+                    f"✅ Successfully upserted {len(ids)} rows to {'PRODUCTION' if USE_PRODUCTION else 'DEVELOPMENT'} database."
                 )
+                if DELTA:
+                        print_delta(stats)
         except Exception as e:
-                print(f"❌ Error connecting to database: {e}")
-                if USE_PRODUCTION:
-                        print("\nℹ️  To import to production, you need to:")
-                        print(
-                            "   1. Get production database credentials from your Replit App"
-                        )
-                        print(
-                            "   2. Set PRODUCTION_DATABASE_URL secret with the production connection string"
-                        )
-                        print(
-                            "   3. Run: python import_from_sheet.py --production"
-                        )
+                print_db_error(e)
+                raise
+
+
+def upsert_stream(path, chunk_size, workers=1):
+        """Parse, normalize and upsert a downloaded sheet one chunk at a time.
+
+        Only a bounded number of chunks is held in memory and each is
+        committed on its own, so peak memory does not grow with the size of
+        the sheet. See prepared_chunks for how workers > 1 overlaps stages.
+        """
+        read = approved = upserted = 0
+        stats = new_stats()
+        started = time.perf_counter()
+
+        print(f"Connecting to database...")
+        try:
+                with db_conn() as conn:
+                        known = {}
+                        if DELTA:
+                                with conn.cursor() as cur:
+                                        known = load_hashes(cur)
+                        t0 = time.perf_counter()
+                        for n, (nread, rows, metrics) in enumerate(
+                                prepared_chunks(path, chunk_size, workers), 1):
+                                merge_metrics(metrics)
+                                sent = 0
+                                if rows:
+                                        with conn.cursor() as cur:
+                                                ids = write_batch(
+                                                    cur, rows, known, stats)
+                                        with stage("db.commit"):
+                                                conn.commit()
+                                        sent = len(ids)
+                                dt = time.perf_counter() - t0
+                                read += nread
+                                approved += len(rows)
+                                upserted += sent
+                                print(
+                                    f"  chunk {n}: {nread} rows read, {sent} upserted in {dt:.2f}s ({nread / dt:,.0f} rows/s)"
+                                )
+                                t0 = time.perf_counter()
+                        with conn.cursor() as cur:
+                                if RETIRE_MISSING and approved:
+                                        with stage("db.retire"):
+                                                retire_missing(cur, known, stats)
+                        with stage("db.commit"):
+                                conn.commit()
+                total = time.perf_counter() - started
+                if not approved:
+                        print("No approved rows to import.")
+                        return
+                print(
+                    f"✅ Successfully upserted {upserted} of {read} rows to {'PRODUCTION' if USE_PRODUCTION else 'DEVELOPMENT'} database in {total:.2f}s."
+                )
+                if DELTA:
+                        print_delta(stats)
+        except psycopg2.Error as e:
+                print_db_error(e)
                 raise
 
 
-def ensure_unique_id():
-        q = 'CREATE UNIQUE INDEX IF NOT EXISTS products_id_key ON products (id);'
-        with psycopg2.connect(DB_URL) as conn:
+_timed_cursor = None
+
+
+def timed_cursor():
+        """Cursor class that records every statement as a db.round_trip."""
+        global _timed_cursor
+        if _timed_cursor is None:
+
+                class TimedCursor(psycopg2.extensions.cursor):
+
+                        def execute(self, query, vars=None):
+                                with stage("db.round_trip"):
+                                        return super().execute(query, vars)
+
+                        def copy_expert(self, sql, file, size=8192):
+                                with stage("db.round_trip"):
+                                        return super().copy_expert(
+                                            sql, file, size)
+
+                _timed_cursor = TimedCursor
+        return _timed_cursor
+
+
+_pools = {}
+
+
+def db_pool(dsn=None):
+        """Connection pool per database, shared by every stage of an import."""
+        dsn = dsn or DB_URL
+        if dsn not in _pools:
+                with stage("db.connect"):
+                        _pools[dsn] = psycopg2.pool.ThreadedConnectionPool(
+                            1, 4, dsn, cursor_factory=timed_cursor())
+        return _pools[dsn]
+
+
+@contextlib.contextmanager
+def db_conn(dsn=None):
+        pool = db_pool(dsn)
+        conn = pool.getconn()
+        try:
+                conn.cursor().execute("SELECT 1;")
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+                # dropped by the server while idle in the pool
+                pool.putconn(conn, close=True)
+                conn = pool.getconn()
+        try:
+                yield conn
+        finally:
+                pool.putconn(conn)
+
+
+def ensure_unique_id(dsn=None):
+        q = f'CREATE UNIQUE INDEX IF NOT EXISTS {TABLE}_id_key ON {TABLE} (id);'
+        with db_conn(dsn) as conn:
                 with conn.cursor() as cur:
                         cur.execute(q)
                 conn.commit()
 
 
-if __name__ == "__main__":
+def main():
+        if TARGETS:
+                return main_targets()
+        if DRY_RUN:
+                print(f"🔍 DRY RUN AGAINST {'PRODUCTION' if USE_PRODUCTION else 'DEVELOPMENT'} DATABASE")
+        elif USE_PRODUCTION:
+                print("🚀 IMPORTING TO PRODUCTION DATABASE")
+        else:
+                print("🔧 IMPORTING TO DEVELOPMENT DATABASE")
         print("\n" + "=" * 60)
         print(f"📦 PRODUCT IMPORT SCRIPT")
         print("=" * 60)
@@ -402,13 +1321,219 @@ if __name__ == "__main__":
                 response = input("\nContinue anyway? (yes/no): ")
                 if response.lower() not in ['yes', 'y']:
                         print("❌ Aborted.")
-                        sys.exit(0)
+                        return "aborted"
+        return run_import()
+
+
+def main_targets():
+        print(f"{'🔍 DRY RUN AGAINST' if DRY_RUN else '🔀 IMPORTING TO'} "
+              f"{' + '.join(t.upper() for t in TARGETS)} DATABASES")
+        print("\n" + "=" * 60)
+        print(f"📦 PRODUCT IMPORT SCRIPT")
+        print("=" * 60)
+        print(f"Targets: {', '.join(TARGETS)}" +
+              (" (all or nothing)" if ALL_OR_NOTHING else ""))
+        return run_import()
+
+
+def load_sheet(path):
+        """Normalize a downloaded sheet and upsert it into TABLE."""
+        if CHUNK_SIZE:
+                print(f"Streaming in chunks of {CHUNK_SIZE} rows" +
+                      (f" with {WORKERS} workers" if WORKERS > 1 else ""))
+                upsert_stream(path, CHUNK_SIZE, WORKERS)
+        else:
+                with stage("parse"):
+                        raw = pd.read_csv(path)
+                df = normalize(raw)
+                print(f"Found {len(df)} approved/live products to import")
+                upsert(df)
+        if IMAGES:
+                load_images()
+
+
+def load_images(dsn=None):
+        import image_cache
+        print("Resolving product images...")
+        with db_conn(dsn) as conn:
+                image_cache.refresh(conn)
+                with stage("db.commit"):
+                        conn.commit()
+
+
+def update_snapshot(dsn=None, target=None):
+        """Write the catalog snapshot; without --snapshot, drop the one an
+        earlier import left, since it no longer matches the table."""
+        import catalog_snapshot
+        target = target or ("production" if USE_PRODUCTION else "development")
+        if not SNAPSHOT:
+                catalog_snapshot.drop(target)
+                return
+        print("Writing catalog snapshot...")
+        with db_conn(dsn) as conn:
+                catalog_snapshot.export(conn, target)
+
+
+def import_targets(sheet):
+        """Normalize the sheet once and write it to every target in TARGETS
+        at the same time, one thread and one transaction per target.
+
+        With ALL_OR_NOTHING the targets wait for each other before
+        committing and all roll back if one fails. A commit that fails after
+        the others went through cannot be undone; that target is reported.
+        """
+        dsns = {t: target_url(t) for t in TARGETS}
+        todo = [t for t in TARGETS if FORCE or not already_imported(sheet, dsns[t])]
+        for t in TARGETS:
+                if t not in todo:
+                        print(f"   {t}: sheet unchanged since the last import, skipped")
+        if not todo:
+                return "skipped"
+        with stage("parse"):
+                raw = pd.read_csv(sheet["path"])
+        df = normalize(raw)
+        print(f"Found {len(df)} approved/live products to import into {', '.join(todo)}")
+        with stage("encode"):
+                rows = list(encode_rows(df))
+        gate = threading.Barrier(len(todo)) if ALL_OR_NOTHING else None
+        results = METRICS["targets"]
 
+        def run_target(t):
+                started = time.perf_counter()
+                try:
+                        ensure_unique_id(dsns[t])
+                        ids, stats = upsert_rows(rows, dsns[t],
+                                                 gate.wait if gate else None)
+                        results[t] = {"outcome": "ok", "upserted": len(ids)}
+                        if DELTA:
+                                results[t].update((k, stats[k]) for k in (
+                                    "inserted", "updated", "unchanged", "retired"))
+                except threading.BrokenBarrierError:
+                        results[t] = {"outcome": "rolled_back",
+                                      "error": "another target failed"}
+                except Exception as e:
+                        if gate:
+                                gate.abort()
+                        message = (str(e).strip().splitlines() or [""])[0]
+                        results[t] = {"outcome": "failed",
+                                      "error": f"{type(e).__name__}: {message}"}
+                results[t]["seconds"] = round(time.perf_counter() - started, 3)
+
+        print("Connecting to databases...")
+        threads = [threading.Thread(target=run_target, args=(t, )) for t in todo]
+        for th in threads:
+                th.start()
+        for th in threads:
+                th.join()
+
+        failed = []
+        for t in todo:
+                r = results[t]
+                if r["outcome"] != "ok":
+                        failed.append(t)
+                        print(f"❌ {t}: {r['outcome']} after {r['seconds']:.2f}s ({r['error']})")
+                        continue
+                delta = ""
+                if DELTA:
+                        delta = (f" (inserted {r['inserted']}, updated {r['updated']}, "
+                                 f"unchanged {r['unchanged']}, retired {r['retired']})")
+                print(f"✅ {t}: upserted {r['upserted']} rows in {r['seconds']:.2f}s{delta}")
+                if IMAGES:
+                        load_images(dsns[t])
+                update_snapshot(dsns[t], t)
+                mark_imported(sheet, dsns[t])
+        if failed:
+                raise SystemExit(f"Import failed for {', '.join(failed)}")
+        return "ok"
+
+
+def run_import():
+        check_settings()
         print(f"\nFetching data from CSV...")
-        ensure_unique_id()
-        df = load_csv(CSV_URL)
-        print(f"Found {len(df)} approved/live products to import")
-        upsert(df)
+        sheet = fetch_sheet(CSV_URL)
+        if DRY_RUN:
+                import dry_run
+                if TARGETS:
+                        dsns = {t: target_url(t) for t in TARGETS}
+                else:
+                        dsns = {"production" if USE_PRODUCTION else "development": DB_URL}
+                dry_run.run(sheet["path"], dsns, DRY_RUN_PATH)
+                return "ok"
+        if TARGETS:
+                if import_targets(sheet) == "skipped":
+                        return "skipped"
+        elif already_imported(sheet) and not FORCE:
+                print(
+                    "✅ Sheet unchanged since the last import to this database, nothing to do (use --force to re-import)."
+                )
+                return "skipped"
+        else:
+                ensure_unique_id()
+                load_sheet(sheet["path"])
+                update_snapshot()
+                mark_imported(sheet)
         print("\n" + "=" * 60)
         print("✅ IMPORT COMPLETE")
         print("=" * 60 + "\n")
+        return "ok"
+
+
+def validate(path=None):
+        """Normalize a sheet without touching the database and print what an
+        import would keep and drop. Reads path, or fetches SHEET_CSV_URL."""
+        if path is None:
+                if not CSV_URL:
+                        raise SystemExit("SHEET_CSV_URL is not set")
+                path = fetch_sheet(CSV_URL)["path"]
+        with stage("parse"):
+                raw = pd.read_csv(path)
+        df = normalize(raw)
+        counters = METRICS["counters"]
+        print(f"{counters['rows.read']} rows read, {counters['rows.approved']} approved/live")
+        for name, n in counters.items():
+                if name.startswith("rows.dropped."):
+                        print(f"   dropped {n} ({name[len('rows.dropped.'):]})")
+        ids = df["id"]
+        blank = int(ids.isna().sum() + (ids == "").sum())
+        dupes = int(ids.dropna().duplicated().sum())
+        if blank:
+                print(f"⚠️  {blank} approved rows have no id")
+        if dupes:
+                print(f"⚠️  {dupes} approved rows repeat an id (the last one wins)")
+        return df
+
+
+def run():
+        """main() plus the --profile and --report handling of a command line
+        run; returns the outcome."""
+        started = time.perf_counter()
+        outcome = "failed"
+        if PROFILE_PATH:
+                import cProfile, pstats
+                profiler = cProfile.Profile()
+                profiler.enable()
+        try:
+                outcome = main()
+        finally:
+                if PROFILE_PATH:
+                        profiler.disable()
+                        profiler.dump_stats(PROFILE_PATH)
+                        print(f"cProfile stats written to {PROFILE_PATH}; top calls:")
+                        pstats.Stats(profiler).sort_stats("cumulative").print_stats(15)
+                if REPORT_PATH:
+                        write_report(REPORT_PATH, outcome,
+                                     time.perf_counter() - started)
+                        print(f"Report written to {REPORT_PATH}")
+        return outcome
+
+
+if __name__ == "__main__":
+        # image_cache and import_worker import this module by name; give them
+        # this instance (settings, metrics, pools) rather than a second copy
+        sys.modules.setdefault("import_from_sheet", sys.modules[__name__])
+
+if __name__ == "__main__" and SERVE:
+        import import_worker
+        import_worker.serve(SERVE_PORT)
+elif __name__ == "__main__":
+        run()
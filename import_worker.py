@@ -0,0 +1,178 @@
+"""Long-lived import worker for import_from_sheet.py.
+
+One process keeps pandas, the sheet cache and a connection pool per
+database warm, and runs imports on request, one at a time:
+
+    POST /imports {"target": "development" | "production", "force": bool,
+                   "delta": bool, "retire_missing": bool, "chunk_size": int,
+                   "workers": int, "images": bool, "snapshot": bool,
+                   "dry_run": bool}
+      or {"targets": ["development", "production"], "all_or_nothing": bool,
+          ...} to write one fetch to several databases (see --targets)
+      streams newline-delimited JSON events: {"event": "started"},
+      {"event": "log", "line": ...} per line printed, then {"event": "done",
+      "outcome": ..., "report": {...}}; 409 while another import runs
+    GET /status  the running job, if any, and the last finished one
+
+    python import_from_sheet.py --serve [port]
+    python cli.py serve [port]
+"""
+import os, io, sys, json, time, threading, contextlib
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import import_from_sheet as imp
+
+JOB_LOCK = threading.Lock()
+JOBS = {"running": None, "last": None}
+
+
+def target_dsn(target):
+        return imp.target_url(target)
+
+
+def configure_job(opts):
+        """Point the importer settings at one job's options."""
+        imp.USE_PRODUCTION = opts.get("target") == "production"
+        imp.DB_URL = target_dsn(opts.get("target"))
+        imp.TARGETS = list(opts.get("targets") or [])
+        imp.ALL_OR_NOTHING = bool(opts.get("all_or_nothing"))
+        imp.FORCE = bool(opts.get("force"))
+        imp.RETIRE_MISSING = bool(opts.get("retire_missing"))
+        imp.DELTA = imp.RETIRE_MISSING or bool(opts.get("delta"))
+        imp.IMAGES = bool(opts.get("images"))
+        imp.SNAPSHOT = bool(opts.get("snapshot"))
+        # counts only: the report's dry_run.* counters, no CSV on the worker
+        imp.DRY_RUN, imp.DRY_RUN_PATH = bool(opts.get("dry_run")), None
+        imp.WORKERS = int(opts.get("workers") or 1)
+        imp.CHUNK_SIZE = int(opts.get("chunk_size") or
+                             (10000 if imp.WORKERS > 1 else 0))
+        imp.METRICS = imp.new_metrics()
+
+
+class EventStream(io.TextIOBase):
+        """stdout replacement that forwards each printed line as a log event.
+
+        A client that goes away stops the stream, not the import.
+        """
+
+        def __init__(self, send):
+                self.send = send
+                self.buf = ""
+
+        def write(self, text):
+                self.buf += text
+                *lines, self.buf = self.buf.split("\n")
+                for line in lines:
+                        self.send({"event": "log", "line": line})
+                return len(text)
+
+
+class ImportHandler(BaseHTTPRequestHandler):
+        def log_message(self, fmt, *args):
+                sys.stderr.write(f"import worker: {fmt % args}\n")
+
+        def send_json(self, status, body):
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        def do_GET(self):
+                if self.path == "/status":
+                        self.send_json(200, JOBS)
+                else:
+                        self.send_json(404, {"error": "not found"})
+
+        def do_POST(self):
+                if self.path != "/imports":
+                        return self.send_json(404, {"error": "not found"})
+                try:
+                        length = int(self.headers.get("Content-Length") or 0)
+                        opts = json.loads(self.rfile.read(length) or b"{}")
+                except ValueError:
+                        return self.send_json(400, {"error": "invalid JSON body"})
+                targets = [imp.TARGET_ALIASES.get(t, t) for t in
+                           opts.get("targets") or [opts.get("target") or "development"]]
+                for target in targets:
+                        if target not in imp.TARGET_URLS:
+                                return self.send_json(400, {"error": f"unknown target: {target}"})
+                        if not target_dsn(target):
+                                return self.send_json(400, {"error": f"no database URL configured for {target}"})
+                if not JOB_LOCK.acquire(blocking=False):
+                        return self.send_json(409, {"error": "an import is already running",
+                                                    "running": JOBS["running"]})
+                try:
+                        self.run_job(dict(opts, target=targets[0],
+                                          targets=targets if len(targets) > 1 else []))
+                finally:
+                        JOBS["running"] = None
+                        JOB_LOCK.release()
+
+        def run_job(self, opts):
+                job = {"id": os.urandom(6).hex(),
+                       "target": ",".join(opts["targets"]) or opts["target"],
+                       "started_at": time.strftime("%Y-%m-%dT%H:%M:%S%z")}
+                JOBS["running"] = job
+                self.send_response(200)
+                self.send_header("Content-Type", "application/x-ndjson")
+                self.send_header("Connection", "close")
+                self.end_headers()
+                self.close_connection = True
+                streaming = [True]
+
+                def send(event):
+                        if not streaming[0]:
+                                return
+                        try:
+                                self.wfile.write(json.dumps(event).encode() + b"\n")
+                                self.wfile.flush()
+                        except OSError:
+                                streaming[0] = False
+
+                send({"event": "started", **job})
+                started = time.perf_counter()
+                outcome = "failed"
+                done = {"event": "done"}
+                with contextlib.redirect_stdout(EventStream(send)):
+                        try:
+                                configure_job(opts)
+                                outcome = imp.run_import()
+                        except (Exception, SystemExit) as e:
+                                done["error"] = f"{type(e).__name__}: {e}"
+                done.update(outcome=outcome,
+                            report=imp.build_report(outcome,
+                                                time.perf_counter() - started))
+                send(done)
+                JOBS["last"] = dict(job, outcome=outcome,
+                                    seconds=done["report"]["seconds"])
+
+
+def serve(port=imp.SERVE_PORT):
+        """Run the import worker until interrupted."""
+        imp.preload()
+        # warm-up only: a database that is down now gets its pool from
+        # db_pool on the first job that needs it
+        for target in imp.TARGET_URLS:
+                if target_dsn(target):
+                        try:
+                                imp.db_pool(target_dsn(target))
+                        except imp.psycopg2.Error as e:
+                                message = (str(e).strip().splitlines() or [""])[0]
+                                sys.stderr.write(f"import worker: {target} unreachable, "
+                                                 f"will connect on first use ({message})\n")
+        srv = ThreadingHTTPServer(("127.0.0.1", port), ImportHandler)
+        print(f"Import worker listening on http://127.0.0.1:{port}")
+        try:
+                srv.serve_forever()
+        except KeyboardInterrupt:
+                pass
+        finally:
+                srv.server_close()
+                for pool in imp._pools.values():
+                        pool.closeall()
+
+
+if __name__ == "__main__":
+        serve()
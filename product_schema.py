@@ -0,0 +1,86 @@
+"""Column spec of the products table.
+
+import_from_sheet.py takes its column order (COLS) and value types from
+here and ddl_init.py migrates the table towards it, so the sheet columns
+and the schema cannot drift apart.
+"""
+
+# Sheet columns in import order -> Postgres type
+SHEET_COLUMNS = {
+    "id": "text",
+    "name": "text",
+    "brand": "text",
+    "description": "text",
+    "price": "numeric",
+    "image_url": "text",
+    "categories": "text[]",
+    "age_range": "text",
+    "rating": "numeric",
+    "review_count": "integer",
+    "affiliate_url": "text",
+    "is_top_pick": "boolean",
+    "is_bestseller": "boolean",
+    "is_new": "boolean",
+    "min_age_months": "integer",
+    "max_age_months": "integer",
+    "age_range_category": "text",
+    "communication_levels": "text",
+    "motor_levels": "text",
+    "cognitive_levels": "text",
+    "social_emotional_levels": "text",
+    "play_type_tags": "text[]",
+    "complexity_level": "text",
+    "challenge_rating": "integer",
+    "attention_duration": "text",
+    "stimulation_level": "text",
+    "structure_preference": "text",
+    "energy_requirement": "text",
+    "sensory_compatibility": "text[]",
+    "social_context": "text[]",
+    "cooperation_required": "boolean",
+    "safety_considerations": "text[]",
+    "special_needs_support": "text[]",
+    "intervention_focus": "text[]",
+    "noise_level": "text",
+    "mess_factor": "text",
+    "setup_time": "text",
+    "space_requirements": "text",
+    "is_liza_toph_certified": "boolean",
+    "status": "text",
+}
+
+# Columns the importer maintains itself
+SYSTEM_COLUMNS = {
+    "content_hash": "text",
+    # variant URLs written by the --images stage (image_cache.py)
+    "image_src": "text",
+    "image_srcset": "text",
+    "image_avif_srcset": "text",
+}
+
+COLUMNS = {**SHEET_COLUMNS, **SYSTEM_COLUMNS}
+
+# Multi-select fields, stored as text[] with a GIN index each
+ARRAY_FIELDS = [c for c, t in COLUMNS.items() if t == "text[]"]
+
+
+def create_table(table="products"):
+    """CREATE TABLE statement for the spec under the given name."""
+    spec = ", ".join(f"{c} {t}" + (" PRIMARY KEY" if c == "id" else "")
+                     for c, t in COLUMNS.items())
+    return f"CREATE TABLE {table} ({spec})"
+
+
+def indexes(table="products"):
+    """(index name, column, DDL) for the indexes table should have; index
+    names start with the table name."""
+    out = [(f"{table}_id_key", "id",
+            f"CREATE UNIQUE INDEX {table}_id_key ON {table} (id)")]
+    out += [(f"{table}_{c}_gin", c,
+             f"CREATE INDEX {table}_{c}_gin ON {table} USING gin ({c})")
+            for c in ARRAY_FIELDS]
+    return out
+
+
+# (index name, column, DDL) of the live table
+INDEXES = indexes()
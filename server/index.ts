@@ -32,6 +32,8 @@ app.use(
 );
 app.use(express.urlencoded({ extended: false }));
 app.use(cookieParser());
+// Product image variants are content-addressed (image_cache.py), so a URL never changes content
+app.use("/uploads/products", express.static(path.join(process.cwd(), "uploads", "products"), { immutable: true, maxAge: "1y" }));
 app.use("/uploads", express.static(path.join(process.cwd(), "uploads")));
 
 // ❌ Removed old middleware that monkey-patched res.json and logged response bodies
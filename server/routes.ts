@@ -9,8 +9,101 @@ import { nanoid } from "nanoid";
 import multer from "multer";
 import path from "path";
 import fs from "fs";
+import os from "os";
 import Stripe from "stripe";
 
+// Reads (and removes) the JSON report written by import_from_sheet.py --report
+const readImportReport = (reportPath: string) => {
+  try {
+    const report = JSON.parse(fs.readFileSync(reportPath, "utf8"));
+    fs.unlinkSync(reportPath);
+    return report;
+  } catch {
+    return null;
+  }
+};
+
+// Runs an import on the warm import worker (import_from_sheet.py --serve at
+// IMPORT_DAEMON_URL) and collects its newline-delimited progress events
+const runImportOnDaemon = async (job: Record<string, unknown>) => {
+  const response = await fetch(`${process.env.IMPORT_DAEMON_URL}/imports`, {
+    method: "POST",
+    headers: { "Content-Type": "application/json" },
+    body: JSON.stringify(job),
+  });
+  if (!response.ok) {
+    const body = await response.json().catch(() => ({}));
+    throw Object.assign(new Error(body.error || `Import worker returned ${response.status}`), { status: response.status });
+  }
+  const events = (await response.text()).split("\n").filter(Boolean).map((line) => JSON.parse(line));
+  const done = events.find((e) => e.event === "done") || { outcome: "failed", error: "Import worker closed the stream early" };
+  return {
+    ok: done.outcome === "ok" || done.outcome === "skipped",
+    output: events.filter((e) => e.event === "log").map((e) => e.line).join("\n"),
+    error: done.error || null,
+    report: done.report || null,
+  };
+};
+
+// Catalog snapshot written by import_from_sheet.py --snapshot. When
+// CATALOG_SNAPSHOT_DIR points at one (e.g. snapshots/catalog/production),
+// GET /api/products is answered from its precompressed files without a query.
+let catalogSnapshot: { mtimeMs: number; index: any } | null = null;
+
+const readCatalogSnapshot = () => {
+  const dir = process.env.CATALOG_SNAPSHOT_DIR;
+  if (!dir) return null;
+  try {
+    const indexPath = path.join(dir, "current.json");
+    const { mtimeMs } = fs.statSync(indexPath);
+    if (!catalogSnapshot || catalogSnapshot.mtimeMs !== mtimeMs) {
+      catalogSnapshot = { mtimeMs, index: JSON.parse(fs.readFileSync(indexPath, "utf8")) };
+    }
+    return catalogSnapshot.index;
+  } catch {
+    return null;
+  }
+};
+
+// Product edits made here are not in the snapshot: fall back to the database
+// until the next import writes a new one
+const dropCatalogSnapshot = () => {
+  catalogSnapshot = null;
+  if (process.env.CATALOG_SNAPSHOT_DIR) {
+    fs.rmSync(path.join(process.env.CATALOG_SNAPSHOT_DIR, "current.json"), { force: true });
+  }
+};
+
+// If-None-Match uses the weak comparison (RFC 9110 §13.1.2): a list of
+// entity tags, or *, each matching with or without W/
+const etagMatches = (header: unknown, etag: string) =>
+  typeof header === "string" &&
+  header.split(",").some((tag) => {
+    const t = tag.trim();
+    return t === "*" || t.replace(/^W\//, "") === etag;
+  });
+
+const sendCatalogSnapshot = (req: any, res: any, index: any, file: string) => {
+  const meta = index.files[file];
+  const accepted = String(req.headers["accept-encoding"] || "");
+  const encoding = ["br", "gzip"].find((e) => meta.encodings.includes(e) && new RegExp(`\\b${e}\\b`).test(accepted));
+  // each content-coding is a different representation, so it gets its own
+  // strong validator ("<sha>-br", "<sha>-gzip"; the identity body keeps "<sha>")
+  const etag = encoding ? `${meta.etag.slice(0, -1)}-${encoding}"` : meta.etag;
+  res.setHeader("ETag", etag);
+  res.setHeader("Vary", "Accept-Encoding");
+  res.setHeader("Cache-Control", "public, max-age=60");
+  if (etagMatches(req.headers["if-none-match"], etag)) {
+    return res.status(304).end();
+  }
+  if (encoding) {
+    res.setHeader("Content-Encoding", encoding);
+  }
+  res.type("application/json");
+  const suffix = encoding === "br" ? ".br" : encoding === "gzip" ? ".gz" : "";
+  res.sendFile(path.resolve(process.env.CATALOG_SNAPSHOT_DIR!, index.version, file + suffix), { etag: false, lastModified: false });
+};
+
 // Helper middleware to check user roles
 const requireRole = (role: string): RequestHandler => {
   return async (req: any, res, next) => {
@@ -324,10 +417,39 @@ export async function registerRoutes(app: Express): Promise<Server> {
     }
   });
 
+  // Age band of a product's max_age_months (inclusive bounds, as the importer
+  // assigns age_range_category), with its milestones by domain. A child's age
+  // is placed with categorizeAgeBand instead, whose bounds are exclusive.
+  app.get("/api/age-bands/:month", async (req, res) => {
+    const month = Number(req.params.month);
+    if (!Number.isInteger(month) || month < 0) {
+      return res.status(400).json({ message: "month must be a whole number of months" });
+    }
+    try {
+      const result = await storage.getAgeBandForMonth(month);
+      if (!result) {
+        return res.status(404).json({ message: "Age band reference data not loaded (python age_reference.py --load)" });
+      }
+      res.json(result);
+    } catch (error) {
+      res.status(500).json({ message: "Server error", error });
+    }
+  });
+
   // Product routes (public)
   app.get("/api/products", async (req, res) => {
     try {
       const { ageRange, category } = req.query;
+      const snapshot = readCatalogSnapshot();
+      if (snapshot) {
+        // own keys only: ?category=constructor must not reach Object.prototype
+        const lookup = (files: Record<string, string>, key: string) =>
+          Object.hasOwn(files, key) ? files[key] : undefined;
+        const file = typeof ageRange === "string" && ageRange ? lookup(snapshot.ageRange, ageRange)
+          : typeof category === "string" && category ? lookup(snapshot.category, category)
+          : "products.json";
+        return file ? sendCatalogSnapshot(req, res, snapshot, file) : res.json([]);
+      }
       let products;
       
       if (ageRange && typeof ageRange === 'string') {
@@ -381,6 +503,7 @@ export async function registerRoutes(app: Express): Promise<Server> {
     try {
       const validatedData = insertProductSchema.parse(req.body);
       const product = await storage.createProduct(validatedData);
+      dropCatalogSnapshot();
       res.json(product);
     } catch (error) {
       if (error instanceof z.ZodError) {
@@ -398,6 +521,7 @@ export async function registerRoutes(app: Express): Promise<Server> {
       if (!product) {
         return res.status(404).json({ message: "Product not found" });
       }
+      dropCatalogSnapshot();
       res.json(product);
     } catch (error) {
       if (error instanceof z.ZodError) {
@@ -414,6 +538,7 @@ export async function registerRoutes(app: Express): Promise<Server> {
       if (!success) {
         return res.status(404).json({ message: "Product not found" });
       }
+      dropCatalogSnapshot();
       res.json({ message: "Product deleted successfully" });
     } catch (error) {
       res.status(500).json({ message: "Server error", error });
@@ -486,53 +611,123 @@ export async function registerRoutes(app: Express): Promise<Server> {
     }
   });
 
-  // Import from Google Sheets endpoints
+  // Import from Google Sheets endpoints. These load the whole sheet in one
+  // transaction, so a failed import leaves the catalog as it was; streaming
+  // with --chunk-size commits chunk by chunk and is left to the CLI.
   app.post("/api/admin/import-dev", isAuthenticated, requireRole("admin"), async (req, res) => {
+    const reportPath = path.join(os.tmpdir(), `import-report-${nanoid()}.json`);
     try {
+      if (process.env.IMPORT_DAEMON_URL) {
+        const result = await runImportOnDaemon({ target: "development" });
+        return res.status(result.ok ? 200 : 500).json({
+          success: result.ok,
+          message: result.ok ? "Development database import completed" : "Import failed",
+          output: result.output,
+          errors: result.error,
+          report: result.report
+        });
+      }
+
       const { exec } = await import("child_process");
       const { promisify } = await import("util");
       const execAsync = promisify(exec);
       
-      const { stdout, stderr } = await execAsync("python3 import_from_sheet.py");
+      const { stdout, stderr } = await execAsync(`python3 import_from_sheet.py --report ${reportPath}`);
       
       res.json({ 
         success: true, 
         message: "Development database import completed",
         output: stdout,
-        errors: stderr || null
+        errors: stderr || null,
+        report: readImportReport(reportPath)
       });
     } catch (error: any) {
-      res.status(500).json({ 
+      res.status(error.status === 409 ? 409 : 500).json({ 
         success: false,
         message: "Import failed", 
         error: error.message,
         output: error.stdout || null,
-        errors: error.stderr || null
+        errors: error.stderr || null,
+        report: readImportReport(reportPath)
       });
     }
   });
 
   app.post("/api/admin/import-production", isAuthenticated, requireRole("admin"), async (req, res) => {
+    const reportPath = path.join(os.tmpdir(), `import-report-${nanoid()}.json`);
     try {
+      if (process.env.IMPORT_DAEMON_URL) {
+        const result = await runImportOnDaemon({ target: "production" });
+        return res.status(result.ok ? 200 : 500).json({
+          success: result.ok,
+          message: result.ok ? "Production database import completed" : "Import failed",
+          output: result.output,
+          errors: result.error,
+          report: result.report
+        });
+      }
+
       const { exec } = await import("child_process");
       const { promisify } = await import("util");
       const execAsync = promisify(exec);
       
-      const { stdout, stderr } = await execAsync("python3 import_from_sheet.py --production");
+      const { stdout, stderr } = await execAsync(`python3 import_from_sheet.py --production --report ${reportPath}`);
       
       res.json({ 
         success: true, 
         message: "Production database import completed",
         output: stdout,
-        errors: stderr || null
+        errors: stderr || null,
+        report: readImportReport(reportPath)
       });
     } catch (error: any) {
-      res.status(500).json({ 
+      res.status(error.status === 409 ? 409 : 500).json({ 
         success: false,
         message: "Import failed", 
         error: error.message,
         output: error.stdout || null,
-        errors: error.stderr || null
+        errors: error.stderr || null,
+        report: readImportReport(reportPath)
+      });
+    }
+  });
+
+  // One fetch written to both databases; neither commits unless both succeed
+  app.post("/api/admin/import-all", isAuthenticated, requireRole("admin"), async (req, res) => {
+    const reportPath = path.join(os.tmpdir(), `import-report-${nanoid()}.json`);
+    try {
+      if (process.env.IMPORT_DAEMON_URL) {
+        const result = await runImportOnDaemon({ targets: ["development", "production"], all_or_nothing: true });
+        return res.status(result.ok ? 200 : 500).json({
+          success: result.ok,
+          message: result.ok ? "Development and production imports completed" : "Import failed",
+          output: result.output,
+          errors: result.error,
+          report: result.report
+        });
+      }
+
+      const { exec } = await import("child_process");
+      const { promisify } = await import("util");
+      const execAsync = promisify(exec);
+
+      const { stdout, stderr } = await execAsync(`python3 import_from_sheet.py --targets dev,prod --all-or-nothing --report ${reportPath}`);
+
+      res.json({
+        success: true,
+        message: "Development and production imports completed",
+        output: stdout,
+        errors: stderr || null,
+        report: readImportReport(reportPath)
+      });
+    } catch (error: any) {
+      res.status(error.status === 409 ? 409 : 500).json({
+        success: false,
+        message: "Import failed",
+        error: error.message,
+        output: error.stdout || null,
+        errors: error.stderr || null,
+        report: readImportReport(reportPath)
       });
     }
   });
@@ -1,8 +1,8 @@
-import { type User, type InsertUser, type RegisterUser, type ChildProfile, type InsertChildProfile, type Milestone, type Product, type InsertProduct, type PlayBoard, type InsertPlayBoard, type Professional, type InsertProfessional, type Pro, type InsertPro, type UpdatePro, type ServiceOffering, type InsertServiceOffering, type ServiceArea, type InsertServiceArea, type GalleryImage, type InsertGalleryImage, type Review, type InsertReview, type Message, type InsertMessage, type Subscription, type InsertSubscription, type PasswordResetToken, type InsertPasswordResetToken, type LoginToken, type InsertLoginToken, type UserChildLink, type InsertUserChildLink, type ReferralToken, type InsertReferralToken, users, childProfiles, milestones, products, playBoards, professionals, pros, serviceOfferings, serviceAreas, galleryImages, reviews, messages, subscriptions, passwordResetTokens, loginTokens, userChildLinks, referralTokens } from "@shared/schema";
+import { type User, type InsertUser, type RegisterUser, type ChildProfile, type InsertChildProfile, type Milestone, type AgeBandRecord, type BandMilestone, type Product, type InsertProduct, type PlayBoard, type InsertPlayBoard, type Professional, type InsertProfessional, type Pro, type InsertPro, type UpdatePro, type ServiceOffering, type InsertServiceOffering, type ServiceArea, type InsertServiceArea, type GalleryImage, type InsertGalleryImage, type Review, type InsertReview, type Message, type InsertMessage, type Subscription, type InsertSubscription, type PasswordResetToken, type InsertPasswordResetToken, type LoginToken, type InsertLoginToken, type UserChildLink, type InsertUserChildLink, type ReferralToken, type InsertReferralToken, users, childProfiles, milestones, ageBands, ageBandMonths, developmentDomains, bandMilestones, products, playBoards, professionals, pros, serviceOfferings, serviceAreas, galleryImages, reviews, messages, subscriptions, passwordResetTokens, loginTokens, userChildLinks, referralTokens } from "@shared/schema";
 import { randomUUID } from "crypto";
 import { neon } from "@neondatabase/serverless";
 import { drizzle } from "drizzle-orm/neon-http";
-import { eq, and, like, gte, gt, lt } from "drizzle-orm";
+import { eq, and, like, gte, gt, lt, sql } from "drizzle-orm";
 
 export interface IStorage {
   getUser(id: string): Promise<User | undefined>;
@@ -18,6 +18,7 @@ export interface IStorage {
   
   getMilestonesByAgeRange(ageRange: string): Promise<Milestone[]>;
   getAllMilestones(): Promise<Milestone[]>;
+  getAgeBandForMonth(month: number): Promise<{ band: AgeBandRecord; milestones: BandMilestone[] } | undefined>;
   
   getProductsByAgeRange(ageRange: string): Promise<Product[]>;
   getProductsByCategory(category: string): Promise<Product[]>;
@@ -327,6 +328,10 @@ export class MemStorage implements IStorage {
     return Array.from(this.milestones.values()).sort((a, b) => a.order - b.order);
   }
 
+  async getAgeBandForMonth(month: number): Promise<{ band: AgeBandRecord; milestones: BandMilestone[] } | undefined> {
+    throw new Error("Age band reference data not implemented for MemStorage");
+  }
+
   async getProductsByAgeRange(ageRange: string): Promise<Product[]> {
     return Array.from(this.products.values()).filter(
       product => product.ageRange === ageRange
@@ -874,6 +879,23 @@ export class DbStorage implements IStorage {
     return result.sort((a, b) => a.order - b.order);
   }
 
+  async getAgeBandForMonth(month: number): Promise<{ band: AgeBandRecord; milestones: BandMilestone[] } | undefined> {
+    await this.ensureInitialized();
+    // age_band_months ends at 216; older ages belong to the last band
+    const rows = await this.db.select({ band: ageBands, milestone: bandMilestones, domain: developmentDomains.name })
+      .from(ageBandMonths)
+      .innerJoin(ageBands, eq(ageBands.id, ageBandMonths.bandId))
+      .leftJoin(bandMilestones, eq(bandMilestones.bandId, ageBands.id))
+      .leftJoin(developmentDomains, eq(developmentDomains.id, bandMilestones.domainId))
+      .where(eq(ageBandMonths.month, Math.min(month, 216)))
+      .orderBy(bandMilestones.domainId, bandMilestones.position);
+    if (rows.length === 0) return undefined;
+    return {
+      band: rows[0].band,
+      milestones: rows.flatMap(r => r.milestone ? [{ ...r.milestone, domain: r.domain ?? "" }] : []),
+    };
+  }
+
   async getProductsByAgeRange(ageRange: string): Promise<Product[]> {
     await this.ensureInitialized();
     return await this.db.select().from(products).where(eq(products.ageRange, ageRange));
@@ -881,8 +903,8 @@ export class DbStorage implements IStorage {
 
   async getProductsByCategory(category: string): Promise<Product[]> {
     await this.ensureInitialized();
-    const allProducts = await this.db.select().from(products);
-    return allProducts.filter(product => product.categories?.includes(category) ?? false);
+    // categories is text[] with a GIN index (ddl_init.py converts legacy text columns)
+    return await this.db.select().from(products).where(sql`${products.categories} @> ARRAY[${category}]::text[]`);
   }
 
   async getAllProducts(): Promise<Product[]> {
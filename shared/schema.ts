@@ -1,5 +1,5 @@
 import { sql } from "drizzle-orm";
-import { pgTable, text, varchar, integer, jsonb, timestamp, boolean, doublePrecision, index } from "drizzle-orm/pg-core";
+import { pgTable, text, varchar, integer, smallint, jsonb, timestamp, boolean, doublePrecision, index } from "drizzle-orm/pg-core";
 import { createInsertSchema } from "drizzle-zod";
 import { z } from "zod";
 
@@ -96,6 +96,40 @@ export const milestones = pgTable("milestones", {
   activityIdeas: jsonb("activity_ideas").$type<string[]>(),
 });
 
+// Age band reference tables, compiled and loaded by age_reference.py --load
+export const ageBands = pgTable("age_bands", {
+  id: smallint("id").primaryKey(),
+  slug: text("slug").notNull().unique(),
+  label: text("label").notNull().unique(),
+  maxMonth: smallint("max_month"),
+  title: text("title"),
+  summary: text("summary"),
+});
+
+// band of a product by max_age_months, for every month 0..216
+export const ageBandMonths = pgTable("age_band_months", {
+  month: smallint("month").primaryKey(),
+  bandId: smallint("band_id").notNull().references(() => ageBands.id),
+});
+
+export const developmentDomains = pgTable("development_domains", {
+  id: smallint("id").primaryKey(),
+  name: text("name").notNull().unique(),
+});
+
+export const bandMilestones = pgTable("band_milestones", {
+  id: integer("id").primaryKey(),
+  bandId: smallint("band_id").notNull().references(() => ageBands.id),
+  domainId: smallint("domain_id").notNull().references(() => developmentDomains.id),
+  position: smallint("position").notNull(),
+  stage: text("stage").notNull(),
+  kind: text("kind").notNull(), // milestone, shift
+  description: text("description").notNull(),
+  support: text("support"),
+}, (table) => [
+  index("band_milestones_band_domain_idx").on(table.bandId, table.domainId),
+]);
+
 export const products = pgTable("products", {
   id: varchar("id").primaryKey().default(sql`gen_random_uuid()`),
   name: text("name").notNull(),
@@ -103,7 +137,11 @@ export const products = pgTable("products", {
   description: text("description").notNull(),
   price: text("price"),
   imageUrl: text("image_url").notNull(),
-  categories: text("categories"),
+  // Pre-sized WebP/AVIF variants written by import_from_sheet.py --images
+  imageSrc: text("image_src"),
+  imageSrcset: text("image_srcset"),
+  imageAvifSrcset: text("image_avif_srcset"),
+  categories: text("categories").array(),
   ageRange: text("age_range").notNull(),
   rating: text("rating"),
   reviewCount: integer("review_count"),
@@ -126,7 +164,7 @@ export const products = pgTable("products", {
   socialEmotionalLevels: text("social_emotional_levels"),
   
   // Play type tags
-  playTypeTags: text("play_type_tags"),
+  playTypeTags: text("play_type_tags").array(),
   
   // Complexity and challenge
   complexityLevel: text("complexity_level"), // simple, moderate, complex, advanced, expert
@@ -137,16 +175,16 @@ export const products = pgTable("products", {
   stimulationLevel: text("stimulation_level"), // low, moderate, high
   structurePreference: text("structure_preference"), // structured, flexible, open_ended
   energyRequirement: text("energy_requirement"), // sedentary, moderate, active, high_energy
-  sensoryCompatibility: text("sensory_compatibility"), // gentle, moderate, intense
+  sensoryCompatibility: text("sensory_compatibility").array(), // gentle, moderate, intense
   
   // Social context
-  socialContext: text("social_context"), // solo_play, paired_play, group_play, family_play
+  socialContext: text("social_context").array(), // solo_play, paired_play, group_play, family_play
   cooperationRequired: boolean("cooperation_required"),
   
   // Safety and special needs
-  safetyConsiderations: text("safety_considerations"), // choking_hazard, supervision_required, small_parts
-  specialNeedsSupport: text("special_needs_support"), // autism_friendly, sensory_processing, speech_therapy, motor_therapy
-  interventionFocus: text("intervention_focus"), // communication, motor_skills, social_skills, behavior_support
+  safetyConsiderations: text("safety_considerations").array(), // choking_hazard, supervision_required, small_parts
+  specialNeedsSupport: text("special_needs_support").array(), // autism_friendly, sensory_processing, speech_therapy, motor_therapy
+  interventionFocus: text("intervention_focus").array(), // communication, motor_skills, social_skills, behavior_support
   
   // Environmental factors
   noiseLevel: text("noise_level"), // quiet, moderate, loud
@@ -330,7 +368,7 @@ export const updateProductSchema = z.object({
   description: z.string().optional(),
   price: z.string().optional(),
   imageUrl: z.string().optional(),
-  categories: z.string().nullable().optional(),
+  categories: z.array(z.string()).nullable().optional(),
   ageRange: z.string().optional(),
   rating: z.string().optional(),
   reviewCount: z.number().int().optional(),
@@ -461,6 +499,8 @@ export const insertSubscriptionSchema = createInsertSchema(subscriptions).omit({
 export type InsertChildProfile = z.infer<typeof insertChildProfileSchema>;
 export type ChildProfile = typeof childProfiles.$inferSelect;
 export type Milestone = typeof milestones.$inferSelect;
+export type AgeBandRecord = typeof ageBands.$inferSelect;
+export type BandMilestone = typeof bandMilestones.$inferSelect & { domain: string };
 export type Product = typeof products.$inferSelect;
 export type InsertProduct = z.infer<typeof insertProductSchema>;
 export type UpdateProduct = z.infer<typeof updateProductSchema>;